@@ -0,0 +1,119 @@
+from sqlalchemy import or_, text
+import logging
+from os import environ
+from time import perf_counter
+
+from analyze import comention
+from analyze.vader import VaderKernel
+from analyze.tickers import find_tickers, invert_labels, IGNORE_SYMBOLS, POST_PREFIX, COMMENT_PREFIX, \
+    UNKNOWN_TICKER_STRING
+from db import archive
+from db.batch import TableBatches
+from db.models import Session, Ticker, notify_update
+from db.partitions import created_since, recent_first
+
+MAX_BATCH = 20000
+# analysis results carry each item's created_utc, which confines the update to that item's month partition
+LABELED_UPDATE = "UPDATE {} SET sentiment = :sentiment, labels = :labels, processed = true " \
+                 "WHERE id = :id AND created_utc = :created_utc"
+SCORED_UPDATE = "UPDATE {} SET sentiment = :sentiment WHERE id = :id AND created_utc = :created_utc"
+TICKER_UPDATE = text("UPDATE tickers SET content_ids = content_ids || :labels WHERE symbol = :symbol")
+log = logging.getLogger(__name__)
+logging.basicConfig(level=environ['LOG_LEVEL'])
+kernel = VaderKernel()
+batches = TableBatches('analysis', MAX_BATCH)
+
+
+def content_query(session, table, since=None):
+    """Builds the query for a batch of content that is unprocessed or has no sentiment, created at or after since
+
+    Returns
+    -------
+    Query
+        A query for id, processed, subreddit, created_utc, archive_segment and text columns of the content
+    """
+    columns = [table.id, table.processed, table.subreddit, table.created_utc, table.archive_segment,
+               archive.text_column(table)]
+    if table.__tablename__ == 'posts':
+        columns.append(table.title)
+    query = session.query(*columns).filter(or_(table.processed.is_(False), table.sentiment.is_(None)))
+    return created_since(query, table, since).limit(batches[table].size)
+
+
+def content_text(table, item, archived):
+    """Finds an item's text, reading it from archived if its text was moved to a segment
+
+    """
+    body = (archived[item.id] if item.archive_segment else item[5]) or ''
+    if table.__tablename__ == 'posts':
+        return item.title + " " + body
+    return body
+
+
+def analyze_content(table):
+    """Labels content with ticker symbols, inverts the labels and scores sentiment from one read of each item
+
+    Labels are only (re)computed for unprocessed content, so content that was
+    already added to the tickers table only gets its missing sentiment.
+
+    Returns
+    -------
+    tuple(list(dict), list(dict(str: list(str))), list(tuple(list(str), str, int)))
+        A tuple with:
+        A list of dictionaries with id, created_utc, sentiment, and for unprocessed content labels and processed keys
+        A list of dictionaries with ticker symbols and the list of content ids labeled with them
+        A list of (symbols, subreddit, created_utc) tuples for newly labeled content mentioning tickers
+    """
+    start = perf_counter()
+    session = Session()
+    tickers = {row.symbol for row in session.query(Ticker.symbol).all()} - set(IGNORE_SYMBOLS)
+    prefix = POST_PREFIX if table.__tablename__ == 'posts' else COMMENT_PREFIX
+
+    ids = []
+    created = []
+    texts = []
+    unprocessed = {}
+    sources = {}
+    rows = recent_first(lambda since: content_query(session, table, since))
+    segments = {item.archive_segment for item in rows if item.archive_segment}
+    archived = archive.segment_texts(session, segments) if segments else {}
+    for item in rows:
+        body = content_text(table, item, archived)
+        ids.append(item.id)
+        created.append(item.created_utc)
+        texts.append(body)
+        if not item.processed:
+            unprocessed[item.id] = body
+            sources[item.id] = (item.subreddit, item.created_utc)
+    session.close()
+
+    content = [{'id': id, 'created_utc': created_utc, 'sentiment': score}
+               for id, created_utc, score in zip(ids, created, kernel.scores(texts))]
+
+    labels = find_tickers(tickers, unprocessed)
+    for update in content:
+        if update['id'] in labels:
+            update['labels'] = list(labels[update['id']])
+            update['processed'] = True
+    mentions = [(list(symbols),) + sources[id] for id, symbols in labels.items()
+                if UNKNOWN_TICKER_STRING not in symbols]
+    batches[table].record(len(ids), perf_counter() - start, sum(len(text) for text in texts))
+    return content, invert_labels(prefix, labels), mentions
+
+
+def write_analysis(table, content, ticker_labels, mentions=()):
+    """Writes content labels and sentiment, appends content ids to tickers and adds co-mentions in one transaction
+
+    """
+    session = Session()
+    labeled = [update for update in content if 'labels' in update]
+    scored = [update for update in content if 'labels' not in update]
+    if labeled:
+        session.execute(text(LABELED_UPDATE.format(table.__tablename__)), labeled)
+    if scored:
+        session.execute(text(SCORED_UPDATE.format(table.__tablename__)), scored)
+    comention.write_mentions(session, mentions)
+    if ticker_labels:
+        session.execute(TICKER_UPDATE, ticker_labels)
+        notify_update(session)
+    session.commit()
@@ -0,0 +1,176 @@
+"""Vectorized backtests of sentiment strategies over all stored symbols
+
+Usage: python -m analyze.backtest [processes]
+"""
+import itertools
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from os import environ
+
+import empyrical
+import numpy as np
+import pandas as pd
+
+from db.models import Session, Ticker
+
+MIN_DAYS = 60
+PARAMETER_GRID = {'lookback': [1, 3, 5, 10, 20],
+                  'threshold': [0, .05, .1, .2, .3, .5],
+                  'hold': [1, 2, 5, 10],
+                  'long_short': [False, True]}
+log = logging.getLogger(__name__)
+logging.basicConfig(level=environ['LOG_LEVEL'])
+# arrays shared with parameter sweep processes
+universe = None
+
+
+def load_universe(symbols=None, min_days=MIN_DAYS):
+    """Loads price and sentiment data for many symbols into date-aligned arrays
+
+    Returns
+    -------
+    tuple(np.ndarray, list(str), np.ndarray, np.ndarray)
+        A tuple with:
+        An array of the union of all trading dates
+        A list of symbols, one per array column
+        A dates x symbols array of opening prices, NaN where a symbol has no data
+        A dates x symbols array of scaled sentiment, 0 where there was no content
+    """
+    session = Session()
+    query = session.query(Ticker.symbol, Ticker.price_data).filter(Ticker.price_data.isnot(None))
+    if symbols is not None:
+        query = query.filter(Ticker.symbol.in_(symbols))
+
+    opens = {}
+    sentiment = {}
+    for symbol, price_data in query.yield_per(100):
+        if len(price_data) < min_days:
+            continue
+        df = pd.DataFrame(price_data)
+        index = pd.to_datetime(df['date'].str[:10])
+        opens[symbol] = pd.Series(df['adjOpen'].values, index=index)
+        if 'scaled_sentiment' in df.columns:
+            sentiment[symbol] = pd.Series(df['scaled_sentiment'].values, index=index)
+    session.close()
+
+    opens = pd.DataFrame(opens).sort_index()
+    sentiment = pd.DataFrame(sentiment).reindex(index=opens.index, columns=opens.columns).fillna(0)
+    log.info("Loaded " + str(opens.shape[1]) + " symbols over " + str(opens.shape[0]) + " days")
+    return opens.index.values, list(opens.columns), opens.values, sentiment.values
+
+
+def rolling_sum(values, window):
+    """Sums each column over the trailing window, shorter at the start
+
+    Returns
+    -------
+    np.ndarray
+        An array the shape of values
+    """
+    totals = np.cumsum(values, axis=0)
+    totals[window:] = totals[window:] - totals[:-window]
+    return totals
+
+
+def positions(sentiment, lookback, threshold, hold, long_short):
+    """Finds daily positions from the trailing mean sentiment
+
+    A symbol is bought when its mean sentiment over lookback days is above threshold,
+    sold short when below -threshold if long_short, and held for at least hold days.
+
+    Returns
+    -------
+    np.ndarray
+        A dates x symbols array of positions in {-1, 0, 1}
+    """
+    mean = rolling_sum(sentiment, lookback) / lookback
+    signal = (mean > threshold).astype(float)
+    if long_short:
+        signal -= mean < -threshold
+    return np.sign(rolling_sum(signal, hold))
+
+
+def open_returns(opens):
+    """Finds returns from each day's open to the next day's open, 0 where unknown
+
+    Returns
+    -------
+    np.ndarray
+        A dates x symbols array of returns, with the last day 0
+    """
+    output = np.zeros_like(opens)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        output[:-1] = opens[1:] / opens[:-1] - 1
+    output[~np.isfinite(output)] = 0
+    return output
+
+
+def strategy_returns(opens, sentiment, **params):
+    """Finds daily returns of an equal weight portfolio of all open positions
+
+    Sentiment on a date comes from content created before that date's open, so
+    positions are entered at that open.
+
+    Returns
+    -------
+    np.ndarray
+        An array of daily portfolio returns
+    """
+    held = positions(sentiment, **params) * np.isfinite(opens)
+    active = np.abs(held).sum(axis=1)
+    gains = (held * open_returns(opens)).sum(axis=1)
+    return np.divide(gains, active, out=np.zeros_like(gains), where=active > 0)
+
+
+def metrics(returns):
+    return {'annual_return': empyrical.annual_return(returns),
+            'annual_volatility': empyrical.annual_volatility(returns),
+            'sharpe_ratio': empyrical.sharpe_ratio(returns),
+            'sortino_ratio': empyrical.sortino_ratio(returns),
+            'max_drawdown': empyrical.max_drawdown(returns),
+            'calmar_ratio': empyrical.calmar_ratio(returns)}
+
+
+def share_universe(opens, sentiment):
+    global universe
+    universe = (opens, sentiment)
+
+
+def evaluate(params):
+    """Backtests one parameter set against the shared universe
+
+    Returns
+    -------
+    dict
+        The parameters and their empyrical metrics
+    """
+    output = dict(params)
+    output.update(metrics(strategy_returns(*universe, **params)))
+    return output
+
+
+def parameter_sets(grid=PARAMETER_GRID):
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*[grid[key] for key in keys])]
+
+
+def sweep(opens, sentiment, grid=PARAMETER_GRID, processes=None):
+    """Backtests every parameter set in the grid across a process pool
+
+    Returns
+    -------
+    pd.DataFrame
+        One row of parameters and metrics per parameter set, best Sharpe ratio first
+    """
+    params = parameter_sets(grid)
+    log.info("Backtesting " + str(len(params)) + " parameter sets")
+    with ProcessPoolExecutor(processes, initializer=share_universe, initargs=(opens, sentiment)) as pool:
+        results = list(pool.map(evaluate, params, chunksize=max(1, len(params) // 64)))
+    return pd.DataFrame(results).sort_values('sharpe_ratio', ascending=False)
+
+
+if __name__ == "__main__":
+    dates, symbols, opens, sentiment = load_universe()
+    results = sweep(opens, sentiment, processes=int(sys.argv[1]) if len(sys.argv) > 1 else None)
+    print(results.head(20).to_string(index=False))
@@ -0,0 +1,222 @@
+import io
+from itertools import combinations
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import text
+
+from db.models import Session, CoMentionSymbol, CoMentionDay
+
+DAY_SECONDS = 86400
+# positions are assigned as max + 1, so writers adding symbols take turns
+LOCK_SYMBOLS = text("LOCK TABLE comention_symbols IN SHARE ROW EXCLUSIVE MODE")
+NEW_SYMBOLS = text("INSERT INTO comention_symbols (symbol, position) "
+                   "SELECT :symbol, coalesce(max(position) + 1, 0) FROM comention_symbols "
+                   "ON CONFLICT (symbol) DO NOTHING")
+NEW_DAY = text("INSERT INTO comention_days (day) VALUES (:day) ON CONFLICT (day) DO NOTHING")
+
+
+def day_of(created_utc):
+    return int(created_utc) // DAY_SECONDS
+
+
+def resized(matrix, size):
+    """Pads a square sparse matrix with empty rows and columns up to size
+
+    Returns
+    -------
+    csr_matrix
+        A size x size matrix with the same entries
+    """
+    if matrix.shape[0] == size:
+        return matrix
+    coo = matrix.tocoo()
+    return sparse.csr_matrix((coo.data, (coo.row, coo.col)), shape=(size, size), dtype=np.int64)
+
+
+def to_bytes(matrix):
+    buffer = io.BytesIO()
+    sparse.save_npz(buffer, matrix.tocsr(), compressed=True)
+    return buffer.getvalue()
+
+
+def from_bytes(data):
+    return sparse.load_npz(io.BytesIO(data)).tocsr()
+
+
+class CoMentionGraph:
+    """Counts how often pairs of symbols are mentioned by the same content, per UTC day
+
+    Each day is a symmetric symbol x symbol sparse matrix: the diagonal counts
+    content mentioning a symbol and off-diagonal entries count content mentioning
+    both symbols. Symbols are indexed by their position in symbols.
+    """
+
+    def __init__(self, symbols=None, days=None):
+        self.symbols = list(symbols or [])
+        self.index = {symbol: position for position, symbol in enumerate(self.symbols)}
+        self.days = dict(days or {})
+        self.pending = {}
+
+    def position(self, symbol):
+        if symbol not in self.index:
+            self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return self.index[symbol]
+
+    def add(self, symbols, created_utc):
+        positions = sorted({self.position(symbol) for symbol in symbols})
+        rows, columns = self.pending.setdefault(day_of(created_utc), ([], []))
+        rows += positions
+        columns += positions
+        for first, second in combinations(positions, 2):
+            rows += [first, second]
+            columns += [second, first]
+
+    def add_mentions(self, mentions):
+        """Adds the (symbols, subreddit, created_utc) tuples from analysis.analyze_content
+
+        """
+        for symbols, _, created_utc in mentions:
+            self.add(symbols, created_utc)
+
+    def flush(self):
+        """Folds pending mentions into the day matrices
+
+        Returns
+        -------
+        dict(int: csr_matrix)
+            The counts added to each day
+        """
+        size = len(self.symbols)
+        added = {}
+        for day, (rows, columns) in self.pending.items():
+            added[day] = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, columns)),
+                                           shape=(size, size))
+            self.days[day] = added[day] + resized(self.days[day], size) if day in self.days else added[day]
+        self.pending = {}
+        return added
+
+    def window(self, start=None, end=None):
+        """Sums the day matrices from start through end, as UNIX timestamps
+
+        Returns
+        -------
+        csr_matrix
+            The co-mention counts over the window
+        """
+        self.flush()
+        size = len(self.symbols)
+        output = sparse.csr_matrix((size, size), dtype=np.int64)
+        for day, counts in self.days.items():
+            if (start is None or day >= day_of(start)) and (end is None or day <= day_of(end)):
+                output = output + resized(counts, size)
+        return output
+
+    def neighbors(self, symbol, n=10, start=None, end=None):
+        """Finds the symbols most often mentioned with symbol
+
+        Returns
+        -------
+        list(tuple(str, int))
+            A list of (symbol, count) tuples, largest count first
+        """
+        if symbol not in self.index:
+            return []
+        row = self.window(start, end).getrow(self.index[symbol]).tocoo()
+        pairs = [(self.symbols[column], int(count)) for column, count in zip(row.col, row.data)
+                 if column != self.index[symbol]]
+        return sorted(pairs, key=lambda pair: -pair[1])[:n]
+
+    def top_pairs(self, n=10, start=None, end=None):
+        """Finds the pairs of symbols most often mentioned together
+
+        Returns
+        -------
+        list(tuple(str, str, int))
+            A list of (symbol, symbol, count) tuples, largest count first
+        """
+        pairs = sparse.triu(self.window(start, end), k=1).tocoo()
+        order = np.argsort(-pairs.data, kind='stable')[:n]
+        return [(self.symbols[pairs.row[i]], self.symbols[pairs.col[i]], int(pairs.data[i])) for i in order]
+
+    def to_networkx(self, start=None, end=None, min_count=1):
+        """Builds a weighted graph of the window with mention counts as node attributes
+
+        Returns
+        -------
+        Graph
+            A networkx graph with an edge for each pair mentioned together at least min_count times
+        """
+        import networkx as nx
+        counts = self.window(start, end)
+        mentions = counts.diagonal()
+        graph = nx.Graph()
+        for position in np.flatnonzero(mentions):
+            graph.add_node(self.symbols[position], mentions=int(mentions[position]))
+        pairs = sparse.triu(counts, k=1).tocoo()
+        for first, second, count in zip(pairs.row, pairs.col, pairs.data):
+            if count >= min_count:
+                graph.add_edge(self.symbols[first], self.symbols[second], weight=int(count))
+        return graph
+
+
+def stored_positions(session, symbols):
+    return dict(session.query(CoMentionSymbol.symbol, CoMentionSymbol.position)
+                .filter(CoMentionSymbol.symbol.in_(symbols)).all())
+
+
+def write_mentions(session, mentions):
+    """Adds co-mention counts for a batch of analyzed content to the stored day matrices
+
+    Runs in the caller's transaction so the counts commit with the content they came from.
+    """
+    graph = CoMentionGraph()
+    graph.add_mentions(mentions)
+    added = graph.flush()
+    if not added:
+        return
+    positions = stored_positions(session, graph.symbols)
+    if len(positions) < len(graph.symbols):
+        session.execute(LOCK_SYMBOLS)
+        for symbol in graph.symbols:
+            session.execute(NEW_SYMBOLS, {'symbol': symbol})
+        positions = stored_positions(session, graph.symbols)
+    remap = np.array([positions[symbol] for symbol in graph.symbols])
+    size = int(remap.max()) + 1
+
+    # days are locked in order so concurrent writers cannot deadlock
+    session.execute(NEW_DAY, [{'day': day} for day in sorted(added)])
+    stored = session.query(CoMentionDay).filter(CoMentionDay.day.in_(list(added))) \
+        .order_by(CoMentionDay.day).with_for_update().all()
+    for row in stored:
+        local = added[row.day].tocoo()
+        counts = sparse.csr_matrix((local.data, (remap[local.row], remap[local.col])), shape=(size, size))
+        if row.counts is not None:
+            previous = from_bytes(row.counts)
+            total = max(size, previous.shape[0])
+            counts = resized(counts, total) + resized(previous, total)
+        row.counts = to_bytes(counts)
+
+
+def load_graph(start=None, end=None):
+    """Loads the stored day matrices from start through end, as UNIX timestamps
+
+    Returns
+    -------
+    CoMentionGraph
+        The co-mention counts of the stored days in the window
+    """
+    session = Session()
+    rows = session.query(CoMentionSymbol.symbol, CoMentionSymbol.position).all()
+    symbols = [None] * (max([position for _, position in rows], default=-1) + 1)
+    for symbol, position in rows:
+        symbols[position] = symbol
+    query = session.query(CoMentionDay).filter(CoMentionDay.counts.isnot(None))
+    if start is not None:
+        query = query.filter(CoMentionDay.day >= day_of(start))
+    if end is not None:
+        query = query.filter(CoMentionDay.day <= day_of(end))
+    days = {row.day: resized(from_bytes(row.counts), len(symbols)) for row in query.all()}
+    session.close()
+    return CoMentionGraph(symbols, days)
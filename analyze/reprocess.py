@@ -0,0 +1,222 @@
+"""Recomputes labels and sentiment for all stored content with the current code
+
+Content is split into id ranges that a process pool labels and scores, and each
+range's results are copied into a temporary table and applied with one
+UPDATE ... FROM, committed together with the range's checkpoint. An interrupted
+run resumes where it stopped when started again with the same --run name.
+Stop the worker while a run relabels content.
+
+Usage: python -m analyze.reprocess --processes 8
+"""
+import argparse
+import csv
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from os import environ
+from time import perf_counter
+
+from sqlalchemy import func, text
+
+from analyze import comention
+from analyze.tickers import find_tickers, IGNORE_SYMBOLS, UNKNOWN_TICKER_STRING
+from analyze.vader import VaderKernel
+from db import archive
+from db.models import engine, Session, Post, Comment, Ticker, CoMentionDay, ReprocessRange, notify_update
+
+PARTITION_ROWS = 50000
+TABLES = {'posts': Post, 'comments': Comment}
+CREATE_BATCH = "CREATE TEMP TABLE reprocess_batch " \
+               "(id text, created_utc integer, labels text[], sentiment double precision) ON COMMIT DROP"
+APPLY_BATCH = "UPDATE {0} SET {1} FROM reprocess_batch AS batch " \
+              "WHERE {0}.id = batch.id AND {0}.created_utc = batch.created_utc " \
+              "AND {0}.created_utc BETWEEN :first AND :last"
+ASSIGNMENTS = {'labels': "labels = batch.labels, processed = true", 'sentiment': "sentiment = batch.sentiment"}
+CLEAR_CONTENT_IDS = text("UPDATE tickers SET content_ids = NULL")
+REBUILD_CONTENT_IDS = text(
+    "UPDATE tickers SET content_ids = labeled.ids FROM ("
+    "SELECT symbol, array_agg(content_id) AS ids FROM ("
+    "SELECT unnest(labels) AS symbol, 't3_' || id AS content_id FROM posts "
+    "UNION ALL SELECT unnest(labels), 't1_' || id FROM comments) AS mentions "
+    "GROUP BY symbol) AS labeled WHERE tickers.symbol = labeled.symbol")
+log = logging.getLogger(__name__)
+logging.basicConfig(level=environ['LOG_LEVEL'])
+tickers = None
+kernel = None
+
+
+def plan_ranges(session, table, size=PARTITION_ROWS):
+    """Splits the table's ids into consecutive ranges of size ids
+
+    Returns
+    -------
+    list(tuple(str, str))
+        A list of (after id, through id) tuples
+    """
+    output = []
+    last = ''
+    while True:
+        through = session.query(table.id).filter(table.id > last).order_by(table.id).offset(size - 1).limit(1).scalar()
+        if through is None:
+            through = session.query(func.max(table.id)).filter(table.id > last).scalar()
+            if through is not None:
+                output.append((last, through))
+            return output
+        output.append((last, through))
+        last = through
+
+
+def start_process():
+    global tickers, kernel
+    session = Session()
+    tickers = {row.symbol for row in session.query(Ticker.symbol).all()} - set(IGNORE_SYMBOLS)
+    session.close()
+    kernel = VaderKernel()
+
+
+def range_content(session, table, first, last):
+    """Reads the text of content with ids after first through last, rehydrating archived text
+
+    Returns
+    -------
+    tuple(list, dict(str: str))
+        A tuple with the content rows and a dictionary with content ids as keys and text as values
+    """
+    columns = [table.id, table.subreddit, table.created_utc, archive.text_column(table), table.archive_segment]
+    if table.__tablename__ == 'posts':
+        columns.append(table.title)
+    rows = session.query(*columns).filter(table.id > first, table.id <= last).all()
+    archived = archive.segment_texts(session, {row.archive_segment for row in rows if row.archive_segment})
+    texts = {}
+    for row in rows:
+        body = (archived[row.id] if row.archive_segment else row[3]) or ''
+        if table.__tablename__ == 'posts':
+            body = row.title + " " + body
+        texts[row.id] = body
+    return rows, texts
+
+
+def batch_csv(rows, labels, scores):
+    """Writes content results as CSV for COPY into reprocess_batch
+
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    for row in rows:
+        writer.writerow([row.id, row.created_utc,
+                         '{' + ','.join(sorted(labels[row.id])) + '}' if labels is not None else '',
+                         repr(scores[row.id]) if scores is not None else ''])
+    output.seek(0)
+    return output
+
+
+def process_range(run, table_name, first, last, steps):
+    """Relabels and rescores one id range and checkpoints it in the same transaction
+
+    Returns
+    -------
+    int
+        The number of content items processed
+    """
+    table = TABLES[table_name]
+    session = Session()
+    rows, texts = range_content(session, table, first, last)
+    labels = find_tickers(tickers, texts) if 'labels' in steps else None
+    scores = dict(zip(texts, kernel.scores(list(texts.values())))) if 'sentiment' in steps else None
+
+    if rows:
+        cursor = session.connection().connection.cursor()
+        cursor.execute(CREATE_BATCH)
+        cursor.copy_expert("COPY reprocess_batch FROM STDIN WITH (FORMAT csv)", batch_csv(rows, labels, scores))
+        cursor.close()
+        assignments = ", ".join(ASSIGNMENTS[step] for step in steps)
+        session.execute(text(APPLY_BATCH.format(table_name, assignments)),
+                        {'first': min(row.created_utc for row in rows), 'last': max(row.created_utc for row in rows)})
+    if labels is not None:
+        comention.write_mentions(session, [(list(labels[row.id]), row.subreddit, row.created_utc) for row in rows
+                                           if UNKNOWN_TICKER_STRING not in labels[row.id]])
+    session.query(ReprocessRange).filter_by(run=run, content_table=table_name, first_id=first) \
+        .update({'rows': len(rows), 'done_utc': int(datetime.today().timestamp())})
+    session.commit()
+    return len(rows)
+
+
+def prepare_run(session, run, tables, steps, size, restart):
+    """Plans id ranges for tables without any in this run, clearing co-mentions when a relabeling run starts
+
+    """
+    if restart:
+        session.query(ReprocessRange).filter_by(run=run).delete()
+    if 'labels' in steps and session.query(ReprocessRange).filter_by(run=run).first() is None:
+        session.query(CoMentionDay).delete()
+    for table_name in tables:
+        if session.query(ReprocessRange).filter_by(run=run, content_table=table_name).first() is None:
+            ranges = plan_ranges(session, TABLES[table_name], size)
+            session.add_all([ReprocessRange(run=run, content_table=table_name, first_id=first, last_id=last)
+                             for first, last in ranges])
+            log.info("Planned " + str(len(ranges)) + " " + table_name + " ranges")
+    session.commit()
+
+
+def rebuild_ticker_content(session):
+    """Replaces every ticker's content ids with the content currently labeled with it
+
+    """
+    session.execute(CLEAR_CONTENT_IDS)
+    session.execute(REBUILD_CONTENT_IDS)
+    notify_update(session)
+    session.commit()
+
+
+def reprocess(run='reprocess', tables=tuple(TABLES), steps=tuple(ASSIGNMENTS), processes=None,
+              size=PARTITION_ROWS, restart=False):
+    """Relabels and rescores content across a process pool, skipping ranges this run already finished
+
+    Relabeling rebuilds co-mention counts, which both tables contribute to, so it has to include every table.
+    """
+    if 'labels' in steps and set(tables) != set(TABLES):
+        raise ValueError("relabeling has to include every table, since co-mention counts are rebuilt from all of them")
+    start = perf_counter()
+    session = Session()
+    prepare_run(session, run, tables, steps, size, restart)
+    pending = session.query(ReprocessRange.content_table, ReprocessRange.first_id, ReprocessRange.last_id) \
+        .filter(ReprocessRange.run == run, ReprocessRange.content_table.in_(tables),
+                ReprocessRange.done_utc.is_(None)).all()
+    session.close()
+    log.info("Reprocessing " + str(len(pending)) + " ranges")
+
+    count = 0
+    engine.dispose()  # so pool processes open their own connections instead of sharing the parent's
+    with ProcessPoolExecutor(processes, initializer=start_process) as pool:
+        futures = [pool.submit(process_range, run, *item, steps) for item in pending]
+        for done, future in enumerate(as_completed(futures), 1):
+            count += future.result()
+            log.info("Finished " + str(done) + "/" + str(len(pending)) + " ranges, " + str(count) + " items, "
+                     + str(round(count / (perf_counter() - start))) + " items/sec")
+
+    session = Session()
+    remaining = session.query(ReprocessRange).filter_by(run=run, done_utc=None).first()
+    if 'labels' in steps and remaining is None:
+        rebuild_ticker_content(session)
+        log.info("Rebuilt ticker content ids")
+    session.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--run', default='reprocess', help='checkpoint name; rerun with the same name to resume')
+    parser.add_argument('--restart', action='store_true', help='discard the checkpoint of this run first')
+    parser.add_argument('--tables', nargs='+', choices=list(TABLES), default=list(TABLES))
+    parser.add_argument('--steps', nargs='+', choices=list(ASSIGNMENTS), default=list(ASSIGNMENTS))
+    parser.add_argument('--processes', type=int, help='pool size, the number of CPUs by default')
+    parser.add_argument('--partition-rows', type=int, default=PARTITION_ROWS)
+    args = parser.parse_args()
+    if 'labels' in args.steps and set(args.tables) != set(TABLES):
+        parser.error("--steps labels needs every table in --tables")
+    reprocess(args.run, args.tables, args.steps, args.processes, args.partition_rows, args.restart)
+
+
+if __name__ == "__main__":
+    main()
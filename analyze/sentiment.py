@@ -1,57 +1,18 @@
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 """
 Hutto, C.J. & Gilbert, E.E. (2014). VADER: A Parsimonious Rule-based Model for
 Sentiment Analysis of Social Media Text. Eighth International Conference on
 Weblogs and Social Media (ICWSM-14). Ann Arbor, MI, June 2014.
 """
 from datetime import datetime
-from db.models import Session, Ticker, Post, Comment
+from db.models import Session, Ticker, Post, Comment, notify_update
 import pandas as pd
 import logging
 from os import environ
 
-MAX_BATCH = 20000
 log = logging.getLogger(__name__)
 logging.basicConfig(level=environ['LOG_LEVEL'])
 
 
-def write_sentiment(table, update):
-    """Add content sentiment to the database using bulk update
-
-    """
-    session = Session()
-    session.bulk_update_mappings(table, update)
-    session.commit()
-
-
-def sentiment(table):
-    """Sentiment analysis of reddit content
-
-    Returns
-    -------
-    list(dict(str: float))
-        A list of dictionaries with id and sentiment keys, values
-    """
-    session = Session()
-    analyzer = SentimentIntensityAnalyzer()
-
-    if session.query(table.id).filter(table.sentiment.is_(None)).first() is not None:  # check for item w/o sentiment
-        if table.__tablename__ == 'posts':
-            query = session.query(table.id, table.title, table.selftext). \
-                filter(table.sentiment.is_(None)).limit(MAX_BATCH)
-            content = {item.id: item.title + " " + item.selftext for item in query.all()}
-        else:
-            query = session.query(table.id, table.body). \
-                filter(table.sentiment.is_(None)).limit(MAX_BATCH)
-            content = {item.id: item.body for item in query.all()}
-
-        output = []
-        for id, text in content.items():
-            output.append({'id': id, 'sentiment': analyzer.polarity_scores(text)['compound']})
-        return output
-    return []
-
-
 def add_sentiment_to_symbol_data(tickers=None):
     session = Session()
     if tickers is None:
@@ -94,6 +55,7 @@ def update_symbol_data(symbol, ticker, session):
 
     df["date"] = df["date"].astype(str)  # so that we can serialize as json
     ticker.price_data = df.to_dict('records')
+    notify_update(session)
     session.commit()
 
 
@@ -0,0 +1,247 @@
+import hashlib
+import io
+import logging
+from datetime import datetime
+from os import environ
+
+import numpy as np
+
+from db.models import Session, TrendSnapshot
+
+SKETCH_WIDTH = 2048
+SKETCH_DEPTH = 4
+TOP_K = 100
+BUCKET_SECONDS = 3600
+WINDOW_BUCKETS = 24
+BASELINE_DECAY = .05
+TREND_RATIO = 3
+MIN_MENTIONS = 10
+log = logging.getLogger(__name__)
+logging.basicConfig(level=environ['LOG_LEVEL'])
+
+
+class CountMinSketch:
+    """Approximate counts in a fixed depth x width array, never underestimating
+
+    Hashes are stable across processes so that sketches with the same shape can be added.
+    """
+
+    def __init__(self, width=SKETCH_WIDTH, depth=SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.counts = np.zeros((depth, width))
+
+    def cells(self, key):
+        # one 32-bit word of a blake2b digest per row; seeded crc32 is affine in the seed,
+        # so keys of equal length that collide in one row would collide in every row
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=4 * self.depth).digest()
+        return np.arange(self.depth), np.frombuffer(digest, dtype='<u4') % self.width
+
+    def add(self, key, count=1):
+        self.counts[self.cells(key)] += count
+
+    def estimate(self, key):
+        return self.counts[self.cells(key)].min()
+
+    def clear(self):
+        self.counts[:] = 0
+
+
+class SpaceSaving:
+    """Tracks the heavy hitters of a stream in at most k counters (Metwally et al. 2005)
+
+    """
+
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self.counts = {}
+
+    def add(self, key, count=1):
+        if key in self.counts or len(self.counts) < self.k:
+            self.counts[key] = self.counts.get(key, 0) + count
+        else:
+            smallest = min(self.counts, key=self.counts.get)
+            self.counts[key] = self.counts.pop(smallest) + count
+
+    def top(self, n=None):
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:n]
+
+    def clear(self):
+        self.counts = {}
+
+
+class TrendDetector:
+    """Sliding window mention counts per symbol and per subreddit/symbol in fixed memory
+
+    The window is a ring of hourly buckets, each with a count-min sketch for counts
+    and a space-saving summary for candidate keys. Buckets leaving the window are
+    folded into an exponentially decayed baseline sketch; a key is trending when its
+    window count is TREND_RATIO times its baseline for the same span.
+    """
+
+    def __init__(self, window_buckets=WINDOW_BUCKETS, bucket_seconds=BUCKET_SECONDS):
+        self.window_buckets = window_buckets
+        self.bucket_seconds = bucket_seconds
+        self.sketches = [CountMinSketch() for _ in range(window_buckets)]
+        self.candidates = [SpaceSaving() for _ in range(window_buckets)]
+        self.baseline = CountMinSketch()
+        self.baseline_buckets = 0
+        self.current = None
+
+    def advance(self, bucket):
+        """Moves the window forward to bucket, folding expired buckets into the baseline
+
+        """
+        if self.current is None:
+            self.current = bucket
+            return
+        for expired in range(self.current + 1, min(bucket, self.current + self.window_buckets) + 1):
+            index = expired % self.window_buckets
+            self.baseline.counts *= 1 - BASELINE_DECAY
+            self.baseline.counts += BASELINE_DECAY * self.sketches[index].counts
+            self.baseline_buckets += 1
+            self.sketches[index].clear()
+            self.candidates[index].clear()
+        # buckets skipped entirely had no mentions
+        skipped = bucket - self.current - self.window_buckets
+        if skipped > 0:
+            self.baseline.counts *= (1 - BASELINE_DECAY) ** skipped
+            self.baseline_buckets += skipped
+        self.current = max(self.current, bucket)
+
+    def add(self, symbol, subreddit, created_utc):
+        bucket = created_utc // self.bucket_seconds
+        if self.current is None or bucket > self.current:
+            self.advance(bucket)
+        elif bucket <= self.current - self.window_buckets:
+            return  # older than the window
+        index = bucket % self.window_buckets
+        for key in (symbol, subreddit + '/' + symbol):
+            self.sketches[index].add(key)
+            self.candidates[index].add(key)
+
+    def add_mentions(self, mentions):
+        """Adds labeled content to the window
+
+        """
+        for symbols, subreddit, created_utc in mentions:
+            for symbol in symbols:
+                self.add(symbol, subreddit, created_utc)
+
+    def window_count(self, key):
+        return sum(sketch.estimate(key) for sketch in self.sketches)
+
+    def baseline_count(self, key):
+        return self.baseline.estimate(key) * self.window_buckets
+
+    def top(self, n=10, subreddit=None):
+        """Finds the most mentioned keys in the window
+
+        Returns
+        -------
+        list(tuple(str, float))
+            A list of (key, estimated count) tuples, most mentioned first
+        """
+        keys = set()
+        for summary in self.candidates:
+            keys.update(key for key in summary.counts if ('/' in key) == (subreddit is not None))
+        if subreddit is not None:
+            keys = {key for key in keys if key.startswith(subreddit + '/')}
+        counts = [(key, self.window_count(key)) for key in keys]
+        return sorted(counts, key=lambda item: -item[1])[:n]
+
+    def trending(self, n=TOP_K, subreddit=None):
+        """Finds keys whose window count jumped against their baseline
+
+        Nothing is reported until a full window of history has been folded into the baseline.
+
+        Returns
+        -------
+        list(dict(str: object))
+            A list of dictionaries with key, count, baseline and ratio, largest ratio first
+        """
+        if self.baseline_buckets < self.window_buckets:
+            return []
+        output = []
+        for key, count in self.top(n, subreddit):
+            baseline = self.baseline_count(key)
+            if count >= MIN_MENTIONS and count >= TREND_RATIO * baseline:
+                output.append({'key': key, 'count': float(count), 'baseline': float(baseline),
+                               'ratio': float(count / baseline) if baseline > 0 else None})
+        return sorted(output, key=lambda item: -(item['ratio'] or float('inf')))
+
+    def to_bytes(self):
+        """Saves the window and baseline sketches, candidates and window position as a compressed npz archive
+
+        """
+        candidates = [(index, key, count) for index, summary in enumerate(self.candidates)
+                      for key, count in summary.counts.items()]
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer,
+                            sketches=np.stack([sketch.counts for sketch in self.sketches]),
+                            baseline=self.baseline.counts,
+                            position=np.array([self.bucket_seconds, self.baseline_buckets,
+                                               -1 if self.current is None else self.current]),
+                            candidate_buckets=np.array([item[0] for item in candidates], dtype=np.int64),
+                            candidate_keys=np.array([item[1] for item in candidates], dtype=str),
+                            candidate_counts=np.array([item[2] for item in candidates], dtype=np.int64))
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Restores a detector saved by to_bytes
+
+        Returns
+        -------
+        TrendDetector
+            A detector with the saved window, baseline and candidates
+        """
+        arrays = np.load(io.BytesIO(data))
+        window_buckets, depth, width = arrays['sketches'].shape
+        bucket_seconds, baseline_buckets, current = (int(value) for value in arrays['position'])
+        detector = cls(window_buckets, bucket_seconds)
+        detector.sketches = [CountMinSketch(width, depth) for _ in range(window_buckets)]
+        for sketch, counts in zip(detector.sketches, arrays['sketches']):
+            sketch.counts[:] = counts
+        detector.baseline = CountMinSketch(width, depth)
+        detector.baseline.counts[:] = arrays['baseline']
+        detector.baseline_buckets = baseline_buckets
+        detector.current = None if current < 0 else current
+        for index, key, count in zip(arrays['candidate_buckets'], arrays['candidate_keys'],
+                                     arrays['candidate_counts']):
+            detector.candidates[int(index)].counts[str(key)] = int(count)
+        return detector
+
+
+def write_snapshot(detector):
+    """Persists the trending and top symbols of the current window, and the detector state in place of the last one
+
+    """
+    session = Session()
+    snapshot = TrendSnapshot(
+        taken_utc=int(datetime.today().timestamp()),
+        window_end=None if detector.current is None else (detector.current + 1) * detector.bucket_seconds,
+        top=[{'key': key, 'count': float(count)} for key, count in detector.top(TOP_K)],
+        trending=detector.trending(),
+        state=detector.to_bytes())
+    session.query(TrendSnapshot).filter(TrendSnapshot.state.isnot(None)).update({'state': None})
+    session.add(snapshot)
+    session.commit()
+    log.info("Trending " + str([item['key'] for item in snapshot.trending]))
+
+
+def load_detector():
+    """Restores the detector from the latest snapshot with saved state, so a restart keeps its baseline
+
+    Returns
+    -------
+    TrendDetector
+        The restored detector, or an empty one if no state was saved
+    """
+    session = Session()
+    state = session.query(TrendSnapshot.state).filter(TrendSnapshot.state.isnot(None)) \
+        .order_by(TrendSnapshot.taken_utc.desc()).limit(1).scalar()
+    session.close()
+    if state is None:
+        return TrendDetector()
+    return TrendDetector.from_bytes(state)
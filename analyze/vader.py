@@ -0,0 +1,268 @@
+"""
+A precompiled VADER compound scorer giving the same scores as
+vaderSentiment.SentimentIntensityAnalyzer(...).polarity_scores(text)['compound']
+
+Hutto, C.J. & Gilbert, E.E. (2014). VADER: A Parsimonious Rule-based Model for
+Sentiment Analysis of Social Media Text. Eighth International Conference on
+Weblogs and Social Media (ICWSM-14). Ann Arbor, MI, June 2014.
+"""
+import math
+import re
+import string
+from functools import lru_cache
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer, BOOSTER_DICT, NEGATE, PUNC_LIST, \
+    SPECIAL_CASE_IDIOMS, C_INCR, N_SCALAR
+
+PUNCTUATION = frozenset(string.punctuation)
+HAS_PUNCTUATION = re.compile('[%s]' % re.escape(string.punctuation))
+# distinct tokens whose stripped forms are kept, least recently used first out
+MAX_TOKEN_CACHE = 50000
+# bit flags for the rules a lowercased word takes part in
+BOOSTER = 1
+NEGATION = 2
+
+
+class VaderKernel:
+    """Scores batches of texts with the VADER rules compiled into one lookup table
+
+    Booster and negation word lists are folded into one table of rule flags, a
+    word's valence is computed once per text however often it repeats, and token
+    normalization is cached across texts in a process-wide LRU cache.
+    """
+
+    def __init__(self, analyzer=None):
+        if analyzer is None:
+            analyzer = SentimentIntensityAnalyzer()
+        self.emojis = analyzer.emojis
+        self.lexicon = analyzer.lexicon
+        self.flags = {}
+        for word in BOOSTER_DICT:
+            self.flags[word] = self.flags.get(word, 0) | BOOSTER
+        for word in NEGATE:
+            self.flags[word] = self.flags.get(word, 0) | NEGATION
+
+    def scores(self, texts):
+        """Finds compound sentiment scores for a batch of texts
+
+        Returns
+        -------
+        list(float)
+            A compound score in [-1, 1] for each text
+        """
+        return [self.compound(text) for text in texts]
+
+    def compound(self, text):
+        """Finds the compound sentiment score of a text
+
+        Returns
+        -------
+        float
+            The compound score in [-1, 1], rounded to 4 places
+        """
+        emojis = self.emojis
+        raw_tokens = text.split()
+        for raw in raw_tokens:
+            if raw in emojis:
+                text = " ".join([emojis.get(raw, raw) for raw in raw_tokens])
+                raw_tokens = text.split()
+                break
+
+        token = strip_token
+        words = []
+        lowers = []
+        for raw in raw_tokens:
+            if len(raw) > 1:
+                word, lower = token(raw)
+                words.append(word)
+                lowers.append(lower)
+        if not words:
+            return 0.0
+
+        count = len(words)
+        caps = sum(1 for word in words if word.isupper())
+        is_cap_diff = 0 < count - caps < count
+
+        # repeated words are scored at their first position, as list.index does in polarity_scores
+        first = {}
+        valences = {}
+        sentiments = []
+        flags = self.flags
+        for position, word in enumerate(words):
+            i = first.setdefault(word, position)
+            valence = valences.get(i)
+            if valence is None:
+                lower = lowers[i]
+                if flags.get(lower, 0) & BOOSTER \
+                        or (lower == 'kind' and i < count - 1 and lowers[i + 1] == 'of'):
+                    valence = 0
+                else:
+                    valence = self.valence(words, lowers, i, is_cap_diff)
+                valences[i] = valence
+            sentiments.append(valence)
+
+        if 'but' in lowers:
+            sentiments = but_check(lowers, sentiments)
+
+        total = float(sum(sentiments))
+        if total != 0:
+            emphasis = punctuation_emphasis(text)
+            total = total + emphasis if total > 0 else total - emphasis
+        return round(normalize(total), 4)
+
+    def valence(self, words, lowers, i, is_cap_diff):
+        """Finds the valence of the word at i, mirroring SentimentIntensityAnalyzer.sentiment_valence
+
+        """
+        lexicon = self.lexicon
+        valence = lexicon.get(lowers[i])
+        if valence is None:
+            return 0
+        if is_cap_diff and words[i].isupper():
+            if valence > 0:
+                valence += C_INCR
+            else:
+                valence -= C_INCR
+
+        for start_i in range(0, 3):
+            if i > start_i and lowers[i - (start_i + 1)] not in lexicon:
+                s = scalar_inc_dec(words[i - (start_i + 1)], lowers[i - (start_i + 1)], valence, is_cap_diff)
+                if start_i == 1 and s != 0:
+                    s = s * 0.95
+                if start_i == 2 and s != 0:
+                    s = s * 0.9
+                valence = valence + s
+                valence = self.negation_check(valence, lowers, start_i, i)
+                if start_i == 2:
+                    valence = special_idioms_check(valence, lowers, i)
+
+        if i > 1 and lowers[i - 1] not in lexicon and lowers[i - 1] == "least":
+            if lowers[i - 2] != "at" and lowers[i - 2] != "very":
+                valence = valence * N_SCALAR
+        elif i > 0 and lowers[i - 1] not in lexicon and lowers[i - 1] == "least":
+            valence = valence * N_SCALAR
+        return valence
+
+    def negated(self, lower):
+        return self.flags.get(lower, 0) & NEGATION or "n't" in lower
+
+    def negation_check(self, valence, lowers, start_i, i):
+        if start_i == 0:
+            if self.negated(lowers[i - 1]):
+                valence = valence * N_SCALAR
+        if start_i == 1:
+            if lowers[i - 2] == "never" and (lowers[i - 1] == "so" or lowers[i - 1] == "this"):
+                valence = valence * 1.25
+            elif lowers[i - 2] == "without" and lowers[i - 1] == "doubt":
+                pass
+            elif self.negated(lowers[i - 2]):
+                valence = valence * N_SCALAR
+        if start_i == 2:
+            if lowers[i - 3] == "never" and (lowers[i - 2] == "so" or lowers[i - 2] == "this") or \
+                    (lowers[i - 1] == "so" or lowers[i - 1] == "this"):
+                valence = valence * 1.25
+            elif lowers[i - 3] == "without" and (lowers[i - 2] == "doubt" or lowers[i - 1] == "doubt"):
+                pass
+            elif self.negated(lowers[i - 3]):
+                valence = valence * N_SCALAR
+        return valence
+
+
+@lru_cache(maxsize=MAX_TOKEN_CACHE)
+def strip_token(token):
+    """Strips one run of leading or trailing punctuation from a token the way SentiText does
+
+    A token is stripped when the punctuation run is in PUNC_LIST and what is left
+    is a punctuation-free word of at least two characters.
+
+    Returns
+    -------
+    tuple(str, str)
+        The stripped token and its lowercase form
+    """
+    word = token
+    if token[0] in PUNCTUATION:
+        start = 1
+        while start < len(token) and token[start] in PUNCTUATION:
+            start += 1
+        if token[:start] in PUNC_LIST and len(token) - start > 1 \
+                and HAS_PUNCTUATION.search(token, start) is None:
+            word = token[start:]
+    elif token[-1] in PUNCTUATION:
+        end = len(token) - 1
+        while end > 0 and token[end - 1] in PUNCTUATION:
+            end -= 1
+        if token[end:] in PUNC_LIST and end > 1 and HAS_PUNCTUATION.search(token, 0, end) is None:
+            word = token[:end]
+    return word, word.lower()
+
+
+def scalar_inc_dec(word, lower, valence, is_cap_diff):
+    scalar = BOOSTER_DICT.get(lower)
+    if scalar is None:
+        return 0.0
+    if valence < 0:
+        scalar *= -1
+    if word.isupper() and is_cap_diff:
+        if valence > 0:
+            scalar += C_INCR
+        else:
+            scalar -= C_INCR
+    return scalar
+
+
+def special_idioms_check(valence, lowers, i):
+    onezero = lowers[i - 1] + " " + lowers[i]
+    twoonezero = lowers[i - 2] + " " + lowers[i - 1] + " " + lowers[i]
+    twoone = lowers[i - 2] + " " + lowers[i - 1]
+    threetwoone = lowers[i - 3] + " " + lowers[i - 2] + " " + lowers[i - 1]
+    threetwo = lowers[i - 3] + " " + lowers[i - 2]
+
+    for seq in (onezero, twoonezero, twoone, threetwoone, threetwo):
+        if seq in SPECIAL_CASE_IDIOMS:
+            valence = SPECIAL_CASE_IDIOMS[seq]
+            break
+
+    if len(lowers) - 1 > i:
+        zeroone = lowers[i] + " " + lowers[i + 1]
+        if zeroone in SPECIAL_CASE_IDIOMS:
+            valence = SPECIAL_CASE_IDIOMS[zeroone]
+    if len(lowers) - 1 > i + 1:
+        zeroonetwo = lowers[i] + " " + lowers[i + 1] + " " + lowers[i + 2]
+        if zeroonetwo in SPECIAL_CASE_IDIOMS:
+            valence = SPECIAL_CASE_IDIOMS[zeroonetwo]
+
+    for n_gram in (threetwoone, threetwo, twoone):
+        if n_gram in BOOSTER_DICT:
+            valence = valence + BOOSTER_DICT[n_gram]
+    return valence
+
+
+def but_check(lowers, sentiments):
+    """Scales sentiment before and after the first 'but', including the original's list.index quirks
+
+    """
+    bi = lowers.index('but')
+    for sentiment in sentiments:
+        if sentiment == 0:  # scaling a zero leaves the sum and every later index lookup unchanged
+            continue
+        si = sentiments.index(sentiment)
+        if si < bi:
+            sentiments[si] = sentiment * 0.5
+        elif si > bi:
+            sentiments[si] = sentiment * 1.5
+    return sentiments
+
+
+def punctuation_emphasis(text):
+    ep_count = min(text.count("!"), 4)
+    qm_count = text.count("?")
+    qm_amplifier = 0
+    if qm_count > 1:
+        qm_amplifier = qm_count * 0.18 if qm_count <= 3 else 0.96
+    return ep_count * 0.292 + qm_amplifier
+
+
+def normalize(score, alpha=15):
+    norm_score = score / math.sqrt((score * score) + alpha)
+    return max(-1.0, min(1.0, norm_score))
@@ -0,0 +1,251 @@
+"""Local stand-ins for the Pushshift, Reddit and Tiingo APIs
+
+Each server replays recorded items or generates synthetic ones, and can add
+latency per request and enforce a fixed window rate limit with the same
+X-Ratelimit headers and 429 responses as the real services.
+"""
+import json
+import random
+import string
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from threading import Lock, Thread
+from time import sleep, time
+from urllib.parse import urlparse, parse_qs
+
+WORDS = ['the', 'stock', 'is', 'going', 'up', 'down', 'buy', 'sell', 'calls', 'puts', 'moon', 'great',
+         'terrible', 'not', 'very', 'earnings', 'but', 'hold', 'good', 'bad', 'price', 'market', 'I', 'think']
+SYMBOLS = ['AAPL', 'TSLA', 'AMD', 'MSFT', 'SPY', 'NVDA', 'F', 'GE', 'BABA', 'ROKU']
+ID_DIGITS = string.digits + string.ascii_lowercase
+
+
+def base36(number):
+    output = ''
+    while True:
+        number, digit = divmod(number, 36)
+        output = ID_DIGITS[digit] + output
+        if number == 0:
+            return output
+
+
+class RateLimit:
+    """A fixed window request limit
+
+    """
+
+    def __init__(self, requests=None, window=60):
+        self.requests = requests
+        self.window = window
+        self.window_start = time()
+        self.used = 0
+        self._lock = Lock()
+
+    def take(self):
+        """Counts a request against the window
+
+        Returns
+        -------
+        tuple(bool, dict(str: str))
+            A tuple with whether the request is allowed, and the rate limit headers to send
+        """
+        if self.requests is None:
+            return True, {}
+        with self._lock:
+            now = time()
+            if now - self.window_start >= self.window:
+                self.window_start = now
+                self.used = 0
+            self.used += 1
+            reset = int(self.window_start + self.window - now) + 1
+            headers = {'X-Ratelimit-Remaining': str(float(max(self.requests - self.used, 0))),
+                       'X-Ratelimit-Used': str(self.used),
+                       'X-Ratelimit-Reset': str(reset)}
+            if self.used > self.requests:
+                headers['Retry-After'] = str(reset)
+                return False, headers
+            return True, headers
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Adds latency and rate limiting, and serializes what the server's respond method returns
+
+    """
+
+    def handle_request(self):
+        fake = self.server.fake
+        sleep(fake.latency)
+        allowed, headers = fake.rate_limit.take()
+        fake.requests += 1
+        if allowed:
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            status, payload = fake.respond(self.command, url.path, params)
+        else:
+            status, payload = 429, {'error': 'Too Many Requests'}
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = handle_request
+    do_POST = handle_request
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class FakeService:
+    """An HTTP server on a background thread
+
+    """
+
+    def __init__(self, latency=0, rate_limit=None, rate_window=60, port=0):
+        self.latency = latency
+        self.rate_limit = RateLimit(rate_limit, rate_window)
+        self.requests = 0
+        self.server = ThreadingServer(('127.0.0.1', port), FakeHandler)
+        self.server.fake = self
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:' + str(self.server.server_address[1])
+
+    def start(self):
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+    def respond(self, method, path, params):
+        raise NotImplementedError
+
+
+def offset_of(subreddit):
+    return sum(map(ord, subreddit)) % 1000
+
+
+def synthetic_text(rng, words):
+    text = [rng.choice(SYMBOLS) if rng.random() < .05 else rng.choice(WORDS) for _ in range(words)]
+    return " ".join(text) + rng.choice(['', '.', '!', '?', '!!'])
+
+
+class FakePushshift(FakeService):
+    """Serves comment and submission searches from recorded items or a synthetic stream
+
+    Synthetic content starts at start_utc with one item per interval seconds per
+    subreddit, up to the current time. Recorded items are dictionaries in the
+    Pushshift response format.
+    """
+
+    def __init__(self, start_utc, interval=60, page_size=500, mean_words=40, recorded=None, **kwargs):
+        super().__init__(**kwargs)
+        self.start_utc = start_utc
+        self.interval = interval
+        self.page_size = page_size
+        self.mean_words = mean_words
+        self.recorded = recorded
+
+    def respond(self, method, path, params):
+        if path.rstrip('/') == '/meta':
+            return 200, {'server_ratelimit_per_minute': self.rate_limit.requests or 120}
+        kind = path.strip('/').split('/')[1] if path.count('/') >= 3 else None
+        if kind not in ('comment', 'submission'):
+            return 404, {'error': 'Unknown path ' + path}
+        after = int(float(params.get('after', 0)))
+        limit = min(int(params.get('limit', self.page_size)), self.page_size)
+        subreddit = params.get('subreddit', 'investing')
+        if self.recorded is not None:
+            items = [item for item in self.recorded.get(kind, [])
+                     if item['created_utc'] > after and item['subreddit'] == subreddit][:limit]
+        else:
+            items = self.synthetic(kind, subreddit, after, limit)
+        return 200, {'data': items}
+
+    def synthetic(self, kind, subreddit, after, limit):
+        first = max(0, (after - self.start_utc) // self.interval + 1)
+        last = (int(time()) - self.start_utc) // self.interval
+        offset = offset_of(subreddit) * 10 ** 9
+        return [self.item(kind, subreddit, offset + index, self.start_utc + index * self.interval)
+                for index in range(first, min(first + limit, last + 1))]
+
+    def item(self, kind, subreddit, number, created_utc):
+        rng = random.Random(number)
+        words = max(1, int(rng.expovariate(1 / self.mean_words)))
+        common = {'id': base36(number), 'created_utc': created_utc, 'retrieved_on': created_utc + 60,
+                  'subreddit': subreddit, 'subreddit_id': 't5_' + base36(offset_of(subreddit)),
+                  'author': 'user' + str(rng.randint(0, 10000)), 'author_flair_text': None,
+                  'author_flair_css_class': None, 'score': rng.randint(-5, 500), 'gildings': {}}
+        if kind == 'comment':
+            common.update({'body': synthetic_text(rng, words), 'link_id': 't3_' + base36(number // 50),
+                           'parent_id': 't3_' + base36(number // 50)})
+        else:
+            common.update({'title': synthetic_text(rng, 10), 'selftext': synthetic_text(rng, words),
+                           'domain': 'self.' + subreddit, 'url': 'https://reddit.com', 'num_comments': 0,
+                           'stickied': False, 'over_18': False, 'thumbnail': 'self', 'is_self': True,
+                           'permalink': '/r/' + subreddit + '/' + base36(number)})
+        return common
+
+
+class FakeReddit(FakeService):
+    """Serves OAuth tokens and /api/info lookups, reporting a fraction of items as deleted
+
+    """
+
+    def __init__(self, deleted_fraction=.02, **kwargs):
+        super().__init__(**kwargs)
+        self.deleted_fraction = deleted_fraction
+
+    def respond(self, method, path, params):
+        if path.endswith('/access_token'):
+            return 200, {'access_token': 'fake', 'token_type': 'bearer', 'expires_in': 3600, 'scope': '*'}
+        if path.rstrip('/') == '/api/info':
+            children = []
+            for fullname in params.get('id', '').split(','):
+                rng = random.Random(fullname)
+                if not fullname or rng.random() < self.deleted_fraction:
+                    continue
+                kind, id = fullname.split('_', 1)
+                children.append({'kind': kind, 'data': {'id': id, 'name': fullname,
+                                                        'created_utc': time() - 2 * 86400,
+                                                        'score': rng.randint(-5, 5000)}})
+            return 200, {'kind': 'Listing', 'data': {'children': children, 'after': None, 'before': None}}
+        return 404, {'error': 'Unknown path ' + path}
+
+
+class FakeTiingo(FakeService):
+    """Serves daily prices from recorded series or a random walk for weekdays since startDate
+
+    """
+
+    def __init__(self, recorded=None, **kwargs):
+        super().__init__(**kwargs)
+        self.recorded = recorded or {}
+
+    def respond(self, method, path, params):
+        parts = path.strip('/').split('/')
+        if len(parts) != 4 or parts[3] != 'prices':
+            return 404, {'detail': 'Not found.'}
+        symbol = parts[2].upper()
+        if symbol in self.recorded:
+            return 200, self.recorded[symbol]
+        rng = random.Random(symbol)
+        day = datetime.strptime(params.get('startDate', '2019-01-01'), '%Y-%m-%d')
+        price = rng.uniform(5, 500)
+        output = []
+        while day <= datetime.today():
+            if day.weekday() < 5:
+                price *= 1 + rng.gauss(0, .02)
+                output.append({'date': day.strftime('%Y-%m-%dT00:00:00.000Z'), 'adjOpen': price,
+                               'adjClose': price * (1 + rng.gauss(0, .01)), 'adjVolume': rng.randint(1, 10 ** 7)})
+            day += timedelta(days=1)
+        return 200, output
@@ -0,0 +1,97 @@
+"""Runs one full worker cycle against the local stand-in services and reports items/sec per stage
+
+Needs DATABASE_URL pointing at a disposable local PostgreSQL database.
+Usage: python -m bench.harness --days 1 --latency 0.05 --rate-limit 120
+"""
+import argparse
+import os
+from datetime import datetime
+from time import perf_counter
+
+from bench.fakes import FakePushshift, FakeReddit, FakeTiingo, SYMBOLS
+
+SUBREDDITS = ["investing", "stocks", "wallstreetbets", "options", "pennystocks", "StockMarket"]
+CREDENTIALS = ['SCRIPT_ID', 'SECRET', 'APPNAME', 'USERNAME', 'PASSWORD', 'TIINGO_API']
+
+
+def start_services(args, start_utc):
+    """Starts the stand-in services and points the scrapers at them
+
+    Returns
+    -------
+    dict(str: FakeService)
+        The running services by name
+    """
+    limits = {'latency': args.latency, 'rate_limit': args.rate_limit}
+    services = {'pushshift': FakePushshift(start_utc, interval=args.interval, page_size=args.page_size,
+                                           mean_words=args.mean_words, **limits).start(),
+                'reddit': FakeReddit(**limits).start(),
+                'tiingo': FakeTiingo(**limits).start()}
+    os.environ['PUSHSHIFT_URL'] = services['pushshift'].url
+    os.environ['REDDIT_OAUTH_URL'] = services['reddit'].url
+    os.environ['REDDIT_URL'] = services['reddit'].url
+    os.environ['TIINGO_URL'] = services['tiingo'].url
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('DATABASE_STRING', os.environ['DATABASE_URL'])
+    for name in CREDENTIALS:
+        os.environ.setdefault(name, 'fake')
+    return services
+
+
+def report(results, services):
+    print("{:<12}{:>10}{:>10}{:>12}".format("stage", "items", "seconds", "items/sec"))
+    for name, items, seconds in results:
+        print("{:<12}{:>10}{:>10.2f}{:>12.1f}".format(name, items, seconds, items / seconds if seconds else 0))
+    print("requests: " + ", ".join(name + " " + str(service.requests) for name, service in services.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=float, default=1, help='days of synthetic history to scrape')
+    parser.add_argument('--interval', type=int, default=60, help='seconds between items per subreddit')
+    parser.add_argument('--subreddits', type=int, default=2)
+    parser.add_argument('--mean-words', type=int, default=40)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0, help='seconds added to every response')
+    parser.add_argument('--rate-limit', type=int, help='requests per minute before 429 responses')
+    args = parser.parse_args()
+
+    now = int(datetime.today().timestamp())
+    start_utc = now - int(args.days * 86400)
+    services = start_services(args, start_utc)
+
+    # imported after the environment points at the services
+    import worker
+    from analyze import sentiment
+    from db.models import Base, engine, Session, Ticker
+    from scrape import stockdata
+
+    Base.metadata.create_all(engine)
+    session = Session()
+    stored = {row.symbol for row in session.query(Ticker.symbol).all()}
+    session.add_all([Ticker(symbol=symbol, name=symbol) for symbol in SYMBOLS if symbol not in stored])
+    session.commit()
+
+    configuration = dict(worker.config, subreddits=SUBREDDITS[:args.subreddits], earliest_content=start_utc,
+                         update_frequency=3600, update_buffer=0, min_loop_seconds=0)
+    w = worker.Worker(configuration)
+    results = []
+    start = perf_counter()
+    w.ensure_partitions()
+    results.append(('partitions', 0, perf_counter() - start))
+    w.run_cycle(lambda name, items, seconds: results.append((name, items, seconds)))
+
+    start = perf_counter()
+    stockdata.update_stock_data(datetime.fromtimestamp(start_utc - 30 * 86400).strftime('%Y-%m-%d'), SYMBOLS)
+    results.append(('prices', len(SYMBOLS), perf_counter() - start))
+    start = perf_counter()
+    sentiment.add_sentiment_to_symbol_data(SYMBOLS)
+    results.append(('sentiment', len(SYMBOLS), perf_counter() - start))
+
+    report(results, services)
+    for service in services.values():
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Moves the text of fully processed old content into compressed segments
+
+Content is eligible once it is processed, has sentiment, is past its final score
+refresh (or deleted) and is older than ARCHIVE_AGE_DAYS. Its body or selftext is
+packed with up to SEGMENT_ROWS others into one zlib-compressed row of
+archive_segments and set to NULL, and archive_segment records where it went.
+Ids and all other columns stay in the content tables.
+"""
+import json
+import logging
+import zlib
+from os import environ
+from time import time
+
+from sqlalchemy import or_, text
+
+from db.models import Session, ArchiveSegment
+
+SEGMENT_ROWS = 5000
+# segments written per table each worker loop
+MAX_SEGMENTS = 20
+ARCHIVE_AGE = int(environ.get('ARCHIVE_AGE_DAYS', 90)) * 86400
+COMPRESSION_LEVEL = 9
+ARCHIVE_ROWS = "UPDATE {0} SET {1} = NULL, archive_segment = :segment " \
+               "WHERE created_utc BETWEEN :first AND :last AND id = ANY(:ids)"
+RESTORE_ROW = "UPDATE {0} SET {1} = :text, archive_segment = NULL " \
+              "WHERE created_utc BETWEEN :first AND :last AND id = :id"
+log = logging.getLogger(__name__)
+logging.basicConfig(level=environ['LOG_LEVEL'])
+
+
+def text_column(table):
+    return table.selftext if table.__tablename__ == 'posts' else table.body
+
+
+def pack(items):
+    """Compresses a list of [id, text] pairs
+
+    """
+    return zlib.compress(json.dumps(items, separators=(',', ':')).encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def unpack(data):
+    """Decompresses a segment
+
+    Returns
+    -------
+    dict(str: str)
+        A dictionary with content ids as keys and text as values
+    """
+    return {id: body for id, body in json.loads(zlib.decompress(data).decode('utf-8'))}
+
+
+def eligible_query(session, table, cutoff, update_frequency):
+    """Builds the query for the oldest segment of unarchived content that is fully processed and created before cutoff
+
+    Returns
+    -------
+    Query
+        A query for id, created_utc and text of the content
+    """
+    return session.query(table.id, table.created_utc, text_column(table)) \
+        .filter(table.archive_segment.is_(None), table.created_utc < cutoff,
+                table.processed.is_(True), table.sentiment.isnot(None),
+                or_(table.update_age >= update_frequency, table.deleted.is_(True))) \
+        .order_by(table.created_utc).limit(SEGMENT_ROWS)
+
+
+def archive_segment(table, update_frequency, age=ARCHIVE_AGE):
+    """Archives the text of up to SEGMENT_ROWS of the oldest eligible content in one transaction
+
+    Returns
+    -------
+    int
+        The number of content items archived
+    """
+    session = Session()
+    rows = eligible_query(session, table, int(time()) - age, update_frequency).all()
+    if not rows:
+        session.close()
+        return 0
+    segment = ArchiveSegment(content_table=table.__tablename__, rows=len(rows),
+                             first_created=rows[0].created_utc, last_created=rows[-1].created_utc,
+                             data=pack([[row[0], row[2]] for row in rows]))
+    session.add(segment)
+    session.flush()
+    session.execute(text(ARCHIVE_ROWS.format(table.__tablename__, text_column(table).key)),
+                    {'segment': segment.id, 'first': segment.first_created, 'last': segment.last_created,
+                     'ids': [row.id for row in rows]})
+    session.commit()
+    log.info("Archived " + str(len(rows)) + " " + table.__tablename__ + " to segment " + str(segment.id))
+    return len(rows)
+
+
+def archive_content(table, update_frequency, max_segments=MAX_SEGMENTS):
+    """Archives eligible content, at most max_segments segments at a time
+
+    Returns
+    -------
+    int
+        The number of content items archived
+    """
+    count = 0
+    for _ in range(max_segments):
+        archived = archive_segment(table, update_frequency)
+        if not archived:
+            break
+        count += archived
+    return count
+
+
+def rehydrate(table, ids):
+    """Finds the text of content whether or not it was archived
+
+    Returns
+    -------
+    dict(str: str)
+        A dictionary with content ids as keys and text as values
+    """
+    session = Session()
+    output = {}
+    archived = {}
+    for id, body, segment in session.query(table.id, text_column(table), table.archive_segment) \
+            .filter(table.id.in_(list(ids))):
+        if segment is None:
+            output[id] = body
+        else:
+            archived.setdefault(segment, []).append(id)
+    texts = segment_texts(session, archived)
+    output.update({id: texts[id] for ids in archived.values() for id in ids})
+    session.close()
+    return output
+
+
+def segment_texts(session, segment_ids):
+    """Reads the archived text of segments
+
+    Returns
+    -------
+    dict(str: str)
+        A dictionary with content ids as keys and text as values
+    """
+    output = {}
+    for segment in session.query(ArchiveSegment).filter(ArchiveSegment.id.in_(list(segment_ids))):
+        output.update(unpack(segment.data))
+    return output
+
+
+def stream_archived(table, after=0):
+    """Yields archived text of a table one segment at a time, in segment order
+
+    Returns
+    -------
+    generator(tuple(int, dict(str: str)))
+        Tuples of segment id and a dictionary with content ids as keys and text as values
+    """
+    session = Session()
+    while True:
+        segment = session.query(ArchiveSegment) \
+            .filter(ArchiveSegment.content_table == table.__tablename__, ArchiveSegment.id > after) \
+            .order_by(ArchiveSegment.id).first()
+        if segment is None:
+            break
+        after = segment.id
+        yield segment.id, unpack(segment.data)
+        session.expunge(segment)
+    session.close()
+
+
+def restore_segment(table, segment_id):
+    """Writes a segment's text back to its content rows and deletes the segment
+
+    """
+    session = Session()
+    segment = session.query(ArchiveSegment).get(segment_id)
+    query = text(RESTORE_ROW.format(table.__tablename__, text_column(table).key))
+    session.execute(query, [{'text': body, 'id': id, 'first': segment.first_created, 'last': segment.last_created}
+                            for id, body in unpack(segment.data).items()])
+    session.delete(segment)
+    session.commit()
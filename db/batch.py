@@ -0,0 +1,104 @@
+import logging
+import os
+import resource
+
+MIN_BATCH = 100
+# process memory ceiling, e.g. the dyno or container limit
+MEMORY_LIMIT_MB = int(os.environ.get('MEMORY_LIMIT_MB', 512))
+# seconds a batch should take to fetch and process
+TARGET_SECONDS = float(os.environ.get('BATCH_TARGET_SECONDS', 10))
+# memory used per byte of fetched text once it is held as Python objects and results
+MEMORY_OVERHEAD = 4
+GROWTH = 1.5
+SMOOTHING = .5
+log = logging.getLogger(__name__)
+logging.basicConfig(level=os.environ['LOG_LEVEL'])
+
+
+def current_rss():
+    """Finds the resident memory of this process
+
+    Returns
+    -------
+    int
+        Resident set size in bytes, or the peak RSS where /proc is not available
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class BatchController:
+    """Chooses a stage's batch size from observed latency, bytes fetched and process memory
+
+    The size grows by GROWTH while batches finish under target_seconds and shrinks
+    toward the size that would. It is capped so that the expected memory of the
+    next batch fits under the memory limit, and halved when the process is already
+    near it.
+    """
+
+    def __init__(self, name, size, minimum=MIN_BATCH, maximum=None, target_seconds=TARGET_SECONDS,
+                 memory_limit=MEMORY_LIMIT_MB * 2 ** 20, rss=current_rss):
+        self.name = name
+        self.size = size
+        self.minimum = minimum
+        self.maximum = size * 4 if maximum is None else maximum
+        self.target_seconds = target_seconds
+        self.memory_limit = memory_limit
+        self.rss = rss
+        self.seconds_per_item = None
+        self.bytes_per_item = None
+
+    def smooth(self, average, value):
+        return value if average is None else SMOOTHING * value + (1 - SMOOTHING) * average
+
+    def record(self, items, seconds, bytes_fetched=0):
+        """Updates the batch size after a batch of items was fetched and processed
+
+        Returns
+        -------
+        int
+            The next batch size
+        """
+        if items > 0:
+            self.seconds_per_item = self.smooth(self.seconds_per_item, seconds / items)
+            self.bytes_per_item = self.smooth(self.bytes_per_item, bytes_fetched / items)
+
+        size = self.size
+        if self.seconds_per_item:
+            size = min(size * GROWTH, self.target_seconds / self.seconds_per_item)
+        rss = self.rss()
+        if rss > .9 * self.memory_limit:
+            size = min(size, self.size / 2)
+        elif self.bytes_per_item:
+            size = min(size, (self.memory_limit - rss) / (self.bytes_per_item * MEMORY_OVERHEAD))
+        size = int(max(self.minimum, min(self.maximum, size)))
+
+        if size != self.size:
+            log.info(self.name + " batch size " + str(self.size) + " -> " + str(size)
+                     + " (" + str(round(seconds, 2)) + "s, " + str(bytes_fetched) + " bytes, "
+                     + str(rss // 2 ** 20) + " MB RSS)")
+        self.size = size
+        return size
+
+
+class TableBatches:
+    """A stage's BatchControllers, one per content table
+
+    Posts and comments differ in text size and processing cost, so each table's
+    batch is sized only from its own measurements.
+    """
+
+    def __init__(self, name, size, **kwargs):
+        self.name = name
+        self.size = size
+        self.kwargs = kwargs
+        self.controllers = {}
+
+    def __getitem__(self, table):
+        name = table.__tablename__
+        if name not in self.controllers:
+            self.controllers[name] = BatchController(self.name + ' ' + name, self.size, **self.kwargs)
+        return self.controllers[name]
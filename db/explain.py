@@ -0,0 +1,83 @@
+"""Fails if any worker query plans a sequential scan of a big table
+
+Usage: python -m db.explain
+"""
+import re
+import sys
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql
+
+from analyze import analysis
+from db import archive
+from db.models import Session, Post, Comment
+from db.partitions import RECENT_SECONDS
+from scrape import reddit, scores
+
+BIG_TABLES = {'comments', 'posts'}
+PARTITION_SUFFIX = re.compile(r'_y\d{4}m\d{2}$')
+UPDATE_FREQUENCY = 86400
+
+
+def worker_queries(session):
+    """Builds the queries the worker runs against content tables
+
+    Queries run through partitions.recent_first are checked both bounded to the
+    recent partitions and unbounded, as the worker falls back to them.
+
+    Returns
+    -------
+    list(tuple(str, Query))
+        A list of (description, query) tuples
+    """
+    now = int(datetime.today().timestamp())
+    update_cutoff = now - UPDATE_FREQUENCY
+    queries = []
+    for table in (Post, Comment):
+        name = table.__tablename__
+        for since, scope in ((now - RECENT_SECONDS, ' (recent)'), (None, ' (all)')):
+            queries += [
+                (name + ' high-water mark' + scope, reddit.latest_query(session, table, 'investing', since)),
+                (name + ' score refresh' + scope,
+                 scores.update_query(session, table, update_cutoff, UPDATE_FREQUENCY, since).limit(scores.MAX_BATCH)),
+                (name + ' analysis batch' + scope, analysis.content_query(session, table, since))]
+        queries.append((name + ' archive segment', archive.eligible_query(session, table, now - archive.ARCHIVE_AGE,
+                                                                          UPDATE_FREQUENCY)))
+    return queries
+
+
+def sequential_scans(plan):
+    """Finds the relations read by sequential scans anywhere in an EXPLAIN (FORMAT JSON) plan
+
+    Returns
+    -------
+    set(str)
+        The names of relations scanned sequentially, with monthly partitions named by their parent table
+    """
+    output = set()
+    if plan.get('Node Type') == 'Seq Scan':
+        output.add(PARTITION_SUFFIX.sub('', plan.get('Relation Name')))
+    for child in plan.get('Plans', []):
+        output |= sequential_scans(child)
+    return output
+
+
+def explain(session, query):
+    sql = str(query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+    return session.execute('EXPLAIN (FORMAT JSON) ' + sql).scalar()[0]['Plan']
+
+
+def main():
+    session = Session()
+    failed = False
+    for description, query in worker_queries(session):
+        scanned = sequential_scans(explain(session, query)) & BIG_TABLES
+        failed = failed or bool(scanned)
+        print(("FAIL " if scanned else "ok   ") + description
+              + (" (seq scan on " + ", ".join(sorted(scanned)) + ")" if scanned else ""))
+    session.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""baseline: comments, posts and tickers tables
+
+Databases created before migrations existed already have these tables;
+mark them as migrated with `alembic stamp 0001` instead of upgrading.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'comments',
+        sa.Column('body', sa.String()),
+        sa.Column('author', sa.String()),
+        sa.Column('author_flair_text', sa.String()),
+        sa.Column('created_utc', sa.Integer()),
+        sa.Column('subreddit_id', sa.String()),
+        sa.Column('link_id', sa.String()),
+        sa.Column('parent_id', sa.String()),
+        sa.Column('score', sa.String()),
+        sa.Column('retrieved_on', sa.Integer()),
+        sa.Column('gilded', sa.String()),
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('subreddit', sa.String()),
+        sa.Column('author_flair_css_class', sa.String()),
+        sa.Column('update_age', sa.Integer()),
+        sa.Column('deleted', sa.Boolean()),
+        sa.Column('processed', sa.Boolean()),
+        sa.Column('labels', postgresql.ARRAY(sa.String())),
+        sa.Column('parent_labels', postgresql.ARRAY(sa.String())),
+        sa.Column('sentiment', sa.Float()))
+    op.create_table(
+        'posts',
+        sa.Column('created_utc', sa.Integer()),
+        sa.Column('subreddit', sa.String()),
+        sa.Column('author', sa.String()),
+        sa.Column('domain', sa.String()),
+        sa.Column('url', sa.String()),
+        sa.Column('num_comments', sa.String()),
+        sa.Column('score', sa.String()),
+        sa.Column('title', sa.String()),
+        sa.Column('selftext', sa.String()),
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('gilded', sa.String()),
+        sa.Column('stickied', sa.String()),
+        sa.Column('retrieved_on', sa.Integer()),
+        sa.Column('over_18', sa.String()),
+        sa.Column('thumbnail', sa.String()),
+        sa.Column('subreddit_id', sa.String()),
+        sa.Column('author_flair_css_class', sa.String()),
+        sa.Column('is_self', sa.String()),
+        sa.Column('permalink', sa.String()),
+        sa.Column('author_flair_text', sa.String()),
+        sa.Column('update_age', sa.Integer()),
+        sa.Column('deleted', sa.Boolean()),
+        sa.Column('labels', postgresql.ARRAY(sa.String())),
+        sa.Column('processed', sa.Boolean()),
+        sa.Column('sentiment', sa.Float()))
+    op.create_table(
+        'tickers',
+        sa.Column('symbol', sa.String(), primary_key=True),
+        sa.Column('name', sa.String()),
+        sa.Column('content_ids', postgresql.ARRAY(sa.String())),
+        sa.Column('price_data', postgresql.JSONB()),
+        sa.Column('last_update', sa.Integer()))
+
+
+def downgrade():
+    op.drop_table('tickers')
+    op.drop_table('posts')
+    op.drop_table('comments')
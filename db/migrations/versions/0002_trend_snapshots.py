@@ -0,0 +1,30 @@
+"""trend_snapshots table for analyze.trends
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'trend_snapshots',
+        sa.Column('taken_utc', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('window_end', sa.Integer()),
+        sa.Column('top', postgresql.JSONB()),
+        sa.Column('trending', postgresql.JSONB()))
+
+
+def downgrade():
+    op.drop_table('trend_snapshots')
@@ -0,0 +1,43 @@
+"""indexes for the worker's hot queries, built concurrently
+
+Partial indexes cover the small unprocessed and unscored slices of comments and
+posts that analysis reads; composite indexes cover the per-subreddit high-water
+mark and the score refresh window. Check plans with `python -m db.explain`.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+TABLES = ['comments', 'posts']
+# name suffix, columns, partial index predicate written as the worker's queries compile
+INDEXES = [('unprocessed', ['id'], sa.text('processed IS false')),
+           ('unscored', ['id'], sa.text('sentiment IS NULL')),
+           ('subreddit_created', ['subreddit', 'created_utc'], None),
+           ('update_age_created', ['update_age', 'created_utc'], None)]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            for suffix, columns, where in INDEXES:
+                op.create_index('ix_{}_{}'.format(table, suffix), table, columns,
+                                postgresql_where=where, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            for suffix, _, _ in INDEXES:
+                op.drop_index('ix_{}_{}'.format(table, suffix), table_name=table, postgresql_concurrently=True)
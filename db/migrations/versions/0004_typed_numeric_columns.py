@@ -0,0 +1,82 @@
+"""integer and boolean types for score, gilded, num_comments and post flags
+
+Runs online: typed shadow columns are added, a trigger keeps them in step with
+writes to the text columns, existing rows are backfilled in id-ordered batches
+that each commit on their own, and the columns are swapped in one short
+transaction at the end. Unparseable values become NULL.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:30:00
+
+"""
+from time import sleep
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+BATCH = 10000
+PAUSE_SECONDS = .1
+INTEGER = "CASE WHEN {0} ~ '^-?[0-9]+$' THEN {0}::integer END"
+BOOLEAN = "CASE WHEN lower({0}) IN ('true', 't', '1') THEN true WHEN lower({0}) IN ('false', 'f', '0') THEN false END"
+COLUMNS = {'comments': {'score': INTEGER, 'gilded': INTEGER},
+           'posts': {'score': INTEGER, 'gilded': INTEGER, 'num_comments': INTEGER,
+                     'stickied': BOOLEAN, 'over_18': BOOLEAN, 'is_self': BOOLEAN}}
+TYPES = {INTEGER: sa.Integer(), BOOLEAN: sa.Boolean()}
+
+
+def add_sync_trigger(table, columns):
+    assignments = "; ".join("NEW.{0}_typed := {1}".format(column, cast.format('NEW.' + column))
+                            for column, cast in columns.items())
+    op.execute("CREATE FUNCTION {0}_typed_sync() RETURNS trigger AS $$ BEGIN {1}; RETURN NEW; END $$ "
+               "LANGUAGE plpgsql".format(table, assignments))
+    op.execute("CREATE TRIGGER {0}_typed_sync BEFORE INSERT OR UPDATE ON {0} "
+               "FOR EACH ROW EXECUTE PROCEDURE {0}_typed_sync()".format(table))
+
+
+def backfill(table, columns):
+    """Fills the typed columns batch by batch in id order, committing after each batch
+
+    """
+    assignments = ", ".join("{0}_typed = {1}".format(column, cast.format(table + '.' + column))
+                            for column, cast in columns.items())
+    query = sa.text("WITH batch AS (SELECT id FROM {0} WHERE id > :last ORDER BY id LIMIT :size), "
+                    "updated AS (UPDATE {0} SET {1} FROM batch WHERE {0}.id = batch.id RETURNING {0}.id) "
+                    "SELECT max(id) FROM updated".format(table, assignments))
+    bind = op.get_bind()
+    last = ''
+    while last is not None:
+        last = bind.execute(query, last=last, size=BATCH).scalar()
+        sleep(PAUSE_SECONDS)
+
+
+def upgrade():
+    for table, columns in COLUMNS.items():
+        for column, cast in columns.items():
+            op.add_column(table, sa.Column(column + '_typed', TYPES[cast]))
+        add_sync_trigger(table, columns)
+
+    with op.get_context().autocommit_block():
+        for table, columns in COLUMNS.items():
+            backfill(table, columns)
+
+    op.execute("SET LOCAL lock_timeout = '10s'")
+    for table, columns in COLUMNS.items():
+        op.execute("DROP TRIGGER {0}_typed_sync ON {0}".format(table))
+        op.execute("DROP FUNCTION {0}_typed_sync()".format(table))
+        for column in columns:
+            op.drop_column(table, column)
+            op.alter_column(table, column + '_typed', new_column_name=column)
+
+
+def downgrade():
+    for table, columns in COLUMNS.items():
+        for column in columns:
+            op.alter_column(table, column, type_=sa.String(), postgresql_using=column + '::text')
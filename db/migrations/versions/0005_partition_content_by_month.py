@@ -0,0 +1,91 @@
+"""monthly range partitions of comments and posts on created_utc
+
+Each table is rebuilt as a partitioned copy with partitions from its oldest
+content through MONTHS_AHEAD months from now, filled in id-ordered batches that
+each commit on their own, indexed, and swapped in for the original. Stop the
+worker while this runs; content it writes during the copy would be lost. The
+worker creates later partitions itself with db.partitions.ensure_partitions.
+Partitions start no later than the worker's earliest_content, so its backfill
+always has a partition to insert into. A worker configured with another
+earliest_content passes it with `alembic -x earliest_content=<UNIX time> upgrade`.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 09:40:00
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+from db.partitions import PARTITIONED_TABLES, ensure_partitions
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+BATCH = 50000
+# worker.config['earliest_content']
+EARLIEST_CONTENT = 1483228818
+# the worker query indexes from 0003
+INDEXES = [('unprocessed', ['id'], sa.text('processed IS false')),
+           ('unscored', ['id'], sa.text('sentiment IS NULL')),
+           ('subreddit_created', ['subreddit', 'created_utc'], None),
+           ('update_age_created', ['update_age', 'created_utc'], None)]
+
+
+def copy_rows(source, target):
+    """Copies every row of source into target batch by batch in id order, committing after each batch
+
+    """
+    query = sa.text("WITH batch AS (SELECT * FROM {0} WHERE id > :last ORDER BY id LIMIT :size), "
+                    "copied AS (INSERT INTO {1} SELECT * FROM batch ON CONFLICT DO NOTHING) "
+                    "SELECT max(id) FROM batch".format(source, target))
+    bind = op.get_bind()
+    last = ''
+    while last is not None:
+        last = bind.execute(query, last=last, size=BATCH).scalar()
+
+
+def create_indexes(table):
+    for suffix, columns, where in INDEXES:
+        op.create_index('ix_{}_{}'.format(table, suffix), table, columns, postgresql_where=where)
+
+
+def swap(table, new):
+    op.drop_table(table)
+    op.rename_table(new, table)
+    op.execute("ALTER TABLE {0} RENAME CONSTRAINT {1}_pkey TO {0}_pkey".format(table, new))
+    for suffix, _, _ in INDEXES:
+        op.execute("ALTER INDEX ix_{1}_{2} RENAME TO ix_{0}_{2}".format(table, new, suffix))
+
+
+def upgrade():
+    bind = op.get_bind()
+    earliest = int(context.get_x_argument(as_dictionary=True).get('earliest_content', EARLIEST_CONTENT))
+    for table in PARTITIONED_TABLES:
+        new = table + '_partitioned'
+        op.execute("CREATE TABLE IF NOT EXISTS {1} (LIKE {0} INCLUDING DEFAULTS, PRIMARY KEY (id, created_utc)) "
+                   "PARTITION BY RANGE (created_utc)".format(table, new))
+        first = bind.execute(sa.text("SELECT min(created_utc) FROM " + table)).scalar()
+        ensure_partitions(bind, since=min(first or earliest, earliest), tables=[table], parent=new)
+
+    with op.get_context().autocommit_block():
+        for table in PARTITIONED_TABLES:
+            copy_rows(table, table + '_partitioned')
+
+    for table in PARTITIONED_TABLES:
+        new = table + '_partitioned'
+        create_indexes(new)
+        swap(table, new)
+
+
+def downgrade():
+    for table in PARTITIONED_TABLES:
+        new = table + '_unpartitioned'
+        op.execute("CREATE TABLE {1} (LIKE {0} INCLUDING DEFAULTS, PRIMARY KEY (id))".format(table, new))
+        op.execute("INSERT INTO {1} SELECT * FROM {0}".format(table, new))
+        create_indexes(new)
+        swap(table, new)
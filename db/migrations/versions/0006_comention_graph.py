@@ -0,0 +1,32 @@
+"""comention_symbols and comention_days tables for analyze.comention
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 09:50:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'comention_symbols',
+        sa.Column('symbol', sa.String(), primary_key=True),
+        sa.Column('position', sa.Integer(), nullable=False, unique=True))
+    op.create_table(
+        'comention_days',
+        sa.Column('day', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('counts', sa.LargeBinary()))
+
+
+def downgrade():
+    op.drop_table('comention_days')
+    op.drop_table('comention_symbols')
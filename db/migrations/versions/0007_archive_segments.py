@@ -0,0 +1,54 @@
+"""archive_segments table and archive_segment columns for db.archive
+
+The partial index that finds unarchived content is built on each partition
+concurrently and attached to an index created on the parent only, so neither
+table is locked against writes while it builds.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from db.partitions import PARTITIONED_TABLES, partitions_of
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+INDEX = 'ix_{}_unarchived_created'
+
+
+def upgrade():
+    op.create_table(
+        'archive_segments',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('content_table', sa.String(), nullable=False),
+        sa.Column('rows', sa.Integer()),
+        sa.Column('first_created', sa.Integer()),
+        sa.Column('last_created', sa.Integer()),
+        sa.Column('data', sa.LargeBinary()))
+    for table in PARTITIONED_TABLES:
+        op.add_column(table, sa.Column('archive_segment', sa.Integer()))
+        op.execute("CREATE INDEX {} ON ONLY {} (created_utc) WHERE archive_segment IS NULL"
+                   .format(INDEX.format(table), table))
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for table in PARTITIONED_TABLES:
+            for partition in partitions_of(bind, table):
+                op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON {} (created_utc) "
+                           "WHERE archive_segment IS NULL".format(INDEX.format(partition), partition))
+                op.execute("ALTER INDEX {} ATTACH PARTITION {}".format(INDEX.format(table), INDEX.format(partition)))
+
+
+def downgrade():
+    for table in PARTITIONED_TABLES:
+        op.execute("DROP INDEX {}".format(INDEX.format(table)))
+        op.drop_column(table, 'archive_segment')
+    op.drop_table('archive_segments')
@@ -0,0 +1,31 @@
+"""reprocess_ranges checkpoint table for analyze.reprocess
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 10:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'reprocess_ranges',
+        sa.Column('run', sa.String(), primary_key=True),
+        sa.Column('content_table', sa.String(), primary_key=True),
+        sa.Column('first_id', sa.String(), primary_key=True),
+        sa.Column('last_id', sa.String(), nullable=False),
+        sa.Column('rows', sa.Integer()),
+        sa.Column('done_utc', sa.Integer()))
+
+
+def downgrade():
+    op.drop_table('reprocess_ranges')
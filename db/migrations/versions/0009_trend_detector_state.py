@@ -0,0 +1,24 @@
+"""trend_snapshots.state for restoring analyze.trends.TrendDetector after a restart
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 10:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('trend_snapshots', sa.Column('state', sa.LargeBinary()))
+
+
+def downgrade():
+    op.drop_column('trend_snapshots', 'state')
@@ -1,18 +1,22 @@
 import os
 
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy import Column, Integer, String, Boolean, ARRAY, Float
-from sqlalchemy import create_engine
+from sqlalchemy import Column, Integer, String, Boolean, ARRAY, Float, LargeBinary, PrimaryKeyConstraint
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 Base = declarative_base()
 engine = create_engine(os.environ['DATABASE_URL'], use_batch_mode=True)
 Session = sessionmaker(bind=engine)
+# Readers LISTEN on this channel to drop cached ticker data after a batch is written
+UPDATE_CHANNEL = 'ticker_update'
 
 
 class Comment(Base):
     __tablename__ = 'comments'
+    # range partitioned by month on created_utc, which the table's primary key has to include
+    __table_args__ = (PrimaryKeyConstraint('id', 'created_utc'), {'postgresql_partition_by': 'RANGE (created_utc)'})
 
     body = Column(String)
     author = Column(String)
@@ -21,10 +25,11 @@ class Comment(Base):
     subreddit_id = Column(String)
     link_id = Column(String)
     parent_id = Column(String)
-    score = Column(String)
+    score = Column(Integer)
     retrieved_on = Column(Integer)
-    gilded = Column(String)
-    id = Column(String, primary_key=True)
+    gilded = Column(Integer)
+    id = Column(String)
+    __mapper_args__ = {'primary_key': [id]}
     subreddit = Column(String)
     author_flair_css_class = Column(String)
     update_age = Column(Integer)
@@ -33,29 +38,33 @@ class Comment(Base):
     labels = Column(ARRAY(String))
     parent_labels = Column(ARRAY(String))
     sentiment = Column(Float)
+    archive_segment = Column(Integer)
 
 
 class Post(Base):
     __tablename__ = 'posts'
+    # range partitioned by month on created_utc, which the table's primary key has to include
+    __table_args__ = (PrimaryKeyConstraint('id', 'created_utc'), {'postgresql_partition_by': 'RANGE (created_utc)'})
 
     created_utc = Column(Integer)
     subreddit = Column(String)
     author = Column(String)
     domain = Column(String)
     url = Column(String)
-    num_comments = Column(String)
-    score = Column(String)
+    num_comments = Column(Integer)
+    score = Column(Integer)
     title = Column(String)
     selftext = Column(String)
-    id = Column(String, primary_key=True)
-    gilded = Column(String)
-    stickied = Column(String)
+    id = Column(String)
+    __mapper_args__ = {'primary_key': [id]}
+    gilded = Column(Integer)
+    stickied = Column(Boolean)
     retrieved_on = Column(Integer)
-    over_18 = Column(String)
+    over_18 = Column(Boolean)
     thumbnail = Column(String)
     subreddit_id = Column(String)
     author_flair_css_class = Column(String)
-    is_self = Column(String)
+    is_self = Column(Boolean)
     permalink = Column(String)
     author_flair_text = Column(String)
     update_age = Column(Integer)
@@ -63,6 +72,7 @@ class Post(Base):
     labels = Column(ARRAY(String))
     processed = Column(Boolean)
     sentiment = Column(Float)
+    archive_segment = Column(Integer)
 
 
 class Ticker(Base):
@@ -75,6 +85,61 @@ class Ticker(Base):
     last_update = Column(Integer)
 
 
+class TrendSnapshot(Base):
+    __tablename__ = 'trend_snapshots'
+
+    taken_utc = Column(Integer, primary_key=True, autoincrement=False)
+    window_end = Column(Integer)
+    top = Column(JSONB)
+    trending = Column(JSONB)
+    # TrendDetector.to_bytes of the latest snapshot only
+    state = Column(LargeBinary)
+
+
+class ArchiveSegment(Base):
+    __tablename__ = 'archive_segments'
+
+    id = Column(Integer, primary_key=True)
+    content_table = Column(String, nullable=False)
+    rows = Column(Integer)
+    first_created = Column(Integer)
+    last_created = Column(Integer)
+    data = Column(LargeBinary)
+
+
+class ReprocessRange(Base):
+    __tablename__ = 'reprocess_ranges'
+
+    run = Column(String, primary_key=True)
+    content_table = Column(String, primary_key=True)
+    # ranges cover ids after first_id through last_id
+    first_id = Column(String, primary_key=True)
+    last_id = Column(String, nullable=False)
+    rows = Column(Integer)
+    done_utc = Column(Integer)
+
+
+class CoMentionSymbol(Base):
+    __tablename__ = 'comention_symbols'
+
+    symbol = Column(String, primary_key=True)
+    position = Column(Integer, unique=True, nullable=False)
+
+
+class CoMentionDay(Base):
+    __tablename__ = 'comention_days'
+
+    day = Column(Integer, primary_key=True, autoincrement=False)
+    counts = Column(LargeBinary)
+
+
+def notify_update(session):
+    """Notifies listeners that ticker data changed once the session commits
+
+    """
+    session.execute(text('NOTIFY ' + UPDATE_CHANNEL))
+
+
 def add_posts(posts):
     session = Session()
     session.add_all([
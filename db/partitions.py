@@ -0,0 +1,98 @@
+"""Monthly range partitions of the content tables on created_utc
+
+Partitions are named {table}_yYYYYmMM and cover [month start, next month start)
+in UTC epoch seconds. Queries that bound created_utc from below only read the
+partitions for recent months.
+"""
+import logging
+import os
+from datetime import datetime, timezone
+from time import time
+
+from sqlalchemy import text
+
+PARTITIONED_TABLES = ['comments', 'posts']
+MONTHS_AHEAD = 3
+# window searched before falling back to all partitions
+RECENT_SECONDS = int(os.environ.get('RECENT_SECONDS', 30 * 86400))
+log = logging.getLogger(__name__)
+
+
+def month_start(timestamp):
+    day = datetime.fromtimestamp(timestamp, timezone.utc)
+    return int(datetime(day.year, day.month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def next_month(start):
+    day = datetime.fromtimestamp(start, timezone.utc)
+    year, month = (day.year + 1, 1) if day.month == 12 else (day.year, day.month + 1)
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def partition_name(table, start):
+    return table + datetime.fromtimestamp(start, timezone.utc).strftime('_y%Ym%m')
+
+
+def month_starts(first, last):
+    """Lists the month starts of every month from the one holding first to the one holding last
+
+    Returns
+    -------
+    list(int)
+        UNIX timestamps of month starts
+    """
+    output = [month_start(first)]
+    while next_month(output[-1]) <= last:
+        output.append(next_month(output[-1]))
+    return output
+
+
+def create_partition(bind, table, start, parent=None):
+    bind.execute(text("CREATE TABLE IF NOT EXISTS {} PARTITION OF {} FOR VALUES FROM ({}) TO ({})"
+                      .format(partition_name(table, start), parent or table, start, next_month(start))))
+
+
+def ensure_partitions(bind, since=None, months_ahead=MONTHS_AHEAD, tables=PARTITIONED_TABLES, parent=None):
+    """Creates any missing partitions from the month holding since through months_ahead months from now
+
+    parent overrides the table the partitions attach to, for building a table under another name
+    """
+    now = int(time())
+    last = now
+    for _ in range(months_ahead):
+        last = next_month(month_start(last))
+    for table in tables:
+        for start in month_starts(now if since is None else since, last):
+            create_partition(bind, table, start, parent)
+    log.info("Partitions ensured through " + datetime.fromtimestamp(last, timezone.utc).strftime('%Y-%m'))
+
+
+def partitions_of(bind, table):
+    """Lists the partitions attached to a partitioned table
+
+    Returns
+    -------
+    list(str)
+        The partition table names
+    """
+    return [row[0] for row in bind.execute(text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = CAST(:table AS regclass) ORDER BY 1"),
+        table=table)]
+
+
+def created_since(query, table, since):
+    return query if since is None else query.filter(table.created_utc >= since)
+
+
+def recent_first(build, window=RECENT_SECONDS):
+    """Runs a query over the last window seconds of partitions, and over all of them if that finds nothing
+
+    build takes the created_utc lower bound, or None for no bound, and returns a Query
+
+    Returns
+    -------
+    list
+        The rows found
+    """
+    rows = build(int(time()) - window).all()
+    return rows if rows else build(None).all()
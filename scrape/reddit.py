@@ -1,12 +1,61 @@
 from psaw import PushshiftAPI
 from sqlalchemy import func
+import json
 import logging
 import os
+import requests
+from time import perf_counter, time
+from db.batch import TableBatches
 from db.models import Session
+from db.partitions import created_since, RECENT_SECONDS
+from scrape.scheduler import scheduler, SCRAPE, API_LIMITS
 
 MAX_BATCH = 10000
+MAX_RETRIES = 20
 log = logging.getLogger(__name__)
 logging.basicConfig(level=os.environ['LOG_LEVEL'])
+pushshift = None
+batches = TableBatches('reddit', MAX_BATCH)
+
+
+class ScheduledPushshiftAPI(PushshiftAPI):
+    """A PushshiftAPI that takes its request budget and backoff from the shared scheduler
+
+    """
+    _base_url = os.environ.get('PUSHSHIFT_URL', 'https://{domain}.pushshift.io') + '/{{endpoint}}'
+
+    def __init__(self, priority=SCRAPE, **kwargs):
+        self.priority = priority
+        super().__init__(rate_limit_per_minute=API_LIMITS['pushshift'][0], **kwargs)
+
+    def _get(self, url, payload={}):
+        for _ in range(MAX_RETRIES):
+            scheduler.acquire('pushshift', self.priority)
+            try:
+                response = requests.get(url, params=payload)
+            except requests.ConnectionError:
+                scheduler.failure('pushshift')
+                continue
+            scheduler.update_from_headers('pushshift', response.headers)
+            if response.status_code == 200:
+                scheduler.success('pushshift')
+                return json.loads(response.text)
+            scheduler.failure('pushshift', response.headers.get('Retry-After'))
+        raise Exception("Unable to connect to pushshift.io. Max retries exceeded.")
+
+
+def pushshift_api():
+    """Gets the Pushshift client shared by all scrapes in this process
+
+    Returns
+    -------
+    ScheduledPushshiftAPI
+        The shared client
+    """
+    global pushshift
+    if pushshift is None:
+        pushshift = ScheduledPushshiftAPI()
+    return pushshift
 
 
 def get_items(table, subreddit, latest):
@@ -17,14 +66,14 @@ def get_items(table, subreddit, latest):
     list(object)
         list of PSAW items (similar to PRAW objects)
     """
-    api = PushshiftAPI()
+    api = pushshift_api()
     if table.__tablename__ == "posts":
         gen = api.search_submissions(after=latest, subreddit=subreddit, limit=1000, sort="asc")
     elif table.__tablename__ == "comments":
         gen = api.search_comments(after=latest, subreddit=subreddit, limit=1000, sort="asc")
     else:
         raise Exception('table cannot be {}, can only get reddit posts or comments'.format(table))
-    max_response_cache = MAX_BATCH
+    max_response_cache = batches[table].size
     cache = []
     for c in gen:
         cache.append(c)
@@ -33,6 +82,14 @@ def get_items(table, subreddit, latest):
     return cache
 
 
+def item_text(item):
+    return getattr(item, 'body', None) or getattr(item, 'selftext', None) or ''
+
+
+def latest_query(session, table, subreddit, since=None):
+    return created_since(session.query(func.max(table.created_utc)).filter_by(subreddit=subreddit), table, since)
+
+
 def latest_item(session, table, subreddit, earliest_content):
     """Finds the created timestamp of the latest content in the database from the specified subreddit
 
@@ -42,7 +99,10 @@ def latest_item(session, table, subreddit, earliest_content):
         The UNIX timestamp of the latest reddit content from the specified subreddit
 
     """
-    latest = session.query(func.max(table.created_utc)).filter_by(subreddit=subreddit).scalar()
+    since = int(time()) - RECENT_SECONDS
+    latest = latest_query(session, table, subreddit, since).scalar()
+    if latest is None:
+        latest = latest_query(session, table, subreddit).scalar()
     if latest is None or latest < earliest_content:
         latest = earliest_content
     return latest
@@ -56,15 +116,17 @@ def scrape_content(subreddit, table, earliest_content):
     list(object)
         list of PSAW items similar to PRAW comment objects
     """
+    start = perf_counter()
     session = Session()
     content = []
     last_update = -1
 
-    while len(content) < MAX_BATCH:
+    while len(content) < batches[table].size:
         latest_content = latest_item(session, table, subreddit, earliest_content)
         if latest_content == last_update:
             break
         content += get_items(table, subreddit, latest_content)
         log.info("Scraped " + subreddit + " " + table.__tablename__ + " from " + str(latest_content))
         last_update = latest_content
+    batches[table].record(len(content), perf_counter() - start, sum(len(item_text(item)) for item in content))
     return content
@@ -0,0 +1,167 @@
+import logging
+import os
+import random
+from collections import Counter
+from threading import Lock
+from time import monotonic, sleep, time
+
+# Priorities, lower goes first
+SCRAPE = 0
+SCORES = 1
+PRICES = 2
+# Fraction of a bucket that a caller of this priority leaves for higher priorities that used the API
+# within its limit period
+RESERVE = {SCRAPE: 0, SCORES: .1, PRICES: .2}
+# (requests, period seconds) for each API
+API_LIMITS = {'pushshift': (int(os.environ.get('PUSHSHIFT_RATE', 120)), 60),
+              'reddit': (int(os.environ.get('REDDIT_RATE', 600)), 600),
+              'tiingo': (int(os.environ.get('TIINGO_RATE', 50)), 3600)}
+BACKOFF_BASE = 2
+MAX_BACKOFF = 600
+POLL_SECONDS = .05
+log = logging.getLogger(__name__)
+logging.basicConfig(level=os.environ['LOG_LEVEL'])
+
+
+class TokenBucket:
+    """A token bucket refilled at capacity / period tokens per second
+
+    The server's view of the limit wins: update resets the tokens and refill rate
+    from the remaining request count and seconds until the limit window resets.
+    """
+
+    def __init__(self, capacity, period, clock=monotonic):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.updated = clock()
+        self.blocked_until = 0
+
+    def refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, reserve=0):
+        """Finds how long until a token beyond the reserve is available
+
+        Returns
+        -------
+        float
+            Seconds to wait, 0 if a token can be taken now
+        """
+        self.refill()
+        if self.updated < self.blocked_until:
+            return self.blocked_until - self.updated
+        if self.tokens - reserve >= 1:
+            return 0
+        return (1 + reserve - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def update(self, remaining, reset_seconds):
+        self.refill()
+        self.tokens = min(self.capacity, remaining)
+        if remaining < 1:
+            self.blocked_until = self.updated + reset_seconds
+        elif reset_seconds > 0:
+            self.rate = remaining / reset_seconds
+
+    def block(self, seconds):
+        self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+
+
+class Scheduler:
+    """Shares rate limit budgets between all clients of each API
+
+    Callers acquire a token before every request; waiting callers of a higher
+    priority are served first, and lower priorities leave a reserve in the bucket
+    while a higher priority is using the same API.
+    Failed requests block the API for a jittered exponential backoff.
+    """
+
+    def __init__(self, limits=API_LIMITS, clock=monotonic, sleeper=sleep):
+        self.buckets = {api: TokenBucket(requests, period, clock) for api, (requests, period) in limits.items()}
+        self.periods = {api: period for api, (_, period) in limits.items()}
+        self.clock = clock
+        self.sleep = sleeper
+        self._failures = Counter()
+        self._waiting = {api: Counter() for api in limits}
+        self._used = {api: {} for api in limits}
+        self._lock = Lock()
+
+    def acquire(self, api, priority):
+        """Blocks until a request to the api may be made
+
+        """
+        bucket = self.buckets[api]
+        with self._lock:
+            self._waiting[api][priority] += 1
+        while True:
+            with self._lock:
+                preempted = any(count > 0 and other < priority for other, count in self._waiting[api].items())
+                wait = bucket.wait_time(self.reserve(api, priority))
+                if not preempted and wait == 0:
+                    bucket.take()
+                    self._waiting[api][priority] -= 1
+                    self._used[api][priority] = self.clock()
+                    return
+            self.sleep(wait or POLL_SECONDS)
+
+    def reserve(self, api, priority):
+        """Finds how many tokens a caller of priority leaves in the api bucket
+
+        Returns
+        -------
+        float
+            RESERVE of the bucket's capacity if a higher priority used the api within its period, otherwise 0
+        """
+        now = self.clock()
+        if any(other < priority and now - used < self.periods[api] for other, used in self._used[api].items()):
+            return RESERVE[priority] * self.buckets[api].capacity
+        return 0
+
+    def update_from_headers(self, api, headers):
+        """Updates the api bucket from X-Ratelimit-Remaining and X-Ratelimit-Reset response headers
+
+        """
+        remaining = headers.get('X-Ratelimit-Remaining')
+        reset = headers.get('X-Ratelimit-Reset')
+        if remaining is not None and reset is not None:
+            with self._lock:
+                self.buckets[api].update(float(remaining), float(reset))
+
+    def update_from_limits(self, api, limits):
+        """Updates the api bucket from PRAW's Reddit.auth.limits
+
+        """
+        if limits.get('remaining') is not None and limits.get('reset_timestamp') is not None:
+            with self._lock:
+                self.buckets[api].update(limits['remaining'], max(limits['reset_timestamp'] - time(), 0))
+
+    def success(self, api):
+        self._failures[api] = 0
+
+    def failure(self, api, retry_after=None):
+        """Blocks the api for a jittered exponential backoff after a failed request
+
+        Returns
+        -------
+        float
+            The number of seconds the api is blocked for
+        """
+        with self._lock:
+            self._failures[api] += 1
+            delay = min(MAX_BACKOFF, BACKOFF_BASE ** self._failures[api])
+            delay = random.uniform(delay / 2, delay)
+            if retry_after is not None:
+                delay = max(delay, float(retry_after))
+            self.buckets[api].block(delay)
+        log.warning("Backing off " + api + " for " + str(round(delay, 1)) + " seconds")
+        return delay
+
+
+# shared by all scrapers in this process
+scheduler = Scheduler()
@@ -1,14 +1,26 @@
 from datetime import datetime
-from time import sleep
+from time import perf_counter
 import logging
 import os
 from prawcore import exceptions
+from sqlalchemy import text
 
+from db.batch import TableBatches
 from db.models import Session
+from db.partitions import created_since, recent_first
+from scrape.scheduler import scheduler, SCORES
 
 MAX_BATCH = 10000
+# reddit.info requests 100 fullnames at a time
+INFO_PAGE = 100
+# matched on id and created_utc so each refreshed score only touches the partition holding its content
+SCORE_UPDATE = "UPDATE {} SET retrieved_on = :retrieved_on, update_age = :update_age, score = :score " \
+               "WHERE id = :id AND created_utc = :created_utc"
+DELETED_UPDATE = "UPDATE {} SET retrieved_on = :retrieved_on, update_age = :update_age, deleted = true " \
+                 "WHERE id = :id AND created_utc = :created_utc"
 log = logging.getLogger(__name__)
 logging.basicConfig(level=os.environ['LOG_LEVEL'])
+batches = TableBatches('scores', MAX_BATCH)
 
 
 def update_content(table, updated, deleted):
@@ -16,13 +28,16 @@ def update_content(table, updated, deleted):
 
     """
     session = Session()
-    deleted_batch = [{'id': item[0], 'retrieved_on': item[1], 'update_age': item[1], 'deleted': True}
+    deleted_batch = [{'id': item[0], 'retrieved_on': item[1], 'update_age': item[1], 'created_utc': item[2]}
                      for item in deleted]
-    updated_batch = [{'id': item[0], 'retrieved_on': item[1], 'update_age': (item[1] - item[2]), 'score': item[3]}
+    updated_batch = [{'id': item[0], 'retrieved_on': item[1], 'update_age': (item[1] - item[2]), 'score': item[3],
+                      'created_utc': item[2]}
                      for item in updated]
 
-    session.bulk_update_mappings(table, deleted_batch)
-    session.bulk_update_mappings(table, updated_batch)
+    if deleted_batch:
+        session.execute(text(DELETED_UPDATE.format(table.__tablename__)), deleted_batch)
+    if updated_batch:
+        session.execute(text(SCORE_UPDATE.format(table.__tablename__)), updated_batch)
     session.commit()
 
 
@@ -31,23 +46,38 @@ def praw_scrape(reddit, scrape_list):
 
     Returns
     -------
-    list(tuple)
+    tuple(list(tuple), bool)
+        A tuple with:
         A list of tuples with (id, timestamp, created_utc, score) representing items that were found
+        True if a request failed, in which case the list only covers the pages fetched before it
     """
-    gen = reddit.info(fullnames=scrape_list)
+    output = []
     try:
-        output = []
         retrieved = int(datetime.today().timestamp())
-        for c in gen:
-            output.append((c.id, retrieved, c.created_utc, c.score))
-    except exceptions.ResponseException as e:
-        log.warning(str(e) + " at " + str(int(datetime.today().timestamp())))
-        return []
-    except exceptions.RequestException as e:
+        for start in range(0, len(scrape_list), INFO_PAGE):
+            scheduler.acquire('reddit', SCORES)
+            for c in reddit.info(fullnames=scrape_list[start:start + INFO_PAGE]):
+                output.append((c.id, retrieved, int(c.created_utc), c.score))
+            scheduler.update_from_limits('reddit', reddit.auth.limits)
+        scheduler.success('reddit')
+    except (exceptions.ResponseException, exceptions.RequestException) as e:
         log.warning(str(e) + " at " + str(int(datetime.today().timestamp())))
-        sleep(60)
-        return []
-    return output
+        scheduler.failure('reddit')
+        return output, True
+    return output, False
+
+
+def update_query(session, table, update_cutoff, update_frequency, since=None):
+    """Builds the query for ids of content created between since and update_cutoff that was not updated update_frequency after creation
+
+    Returns
+    -------
+    Query
+        A query for content ids and created_utc
+    """
+    query = session.query(table.id, table.created_utc). \
+        filter(table.created_utc < update_cutoff, table.update_age < update_frequency)
+    return created_since(query, table, since)
 
 
 def needs_update(session, table, update_frequency, update_buffer):
@@ -63,9 +93,8 @@ def needs_update(session, table, update_frequency, update_buffer):
 
     """
     update_cutoff = int(datetime.today().timestamp()) - (update_frequency + update_buffer)
-    query = session.query(table.update_age). \
-        filter(table.created_utc < update_cutoff, table.update_age < update_frequency).first()
-    return query is not None
+    return bool(recent_first(lambda since: update_query(session, table, update_cutoff, update_frequency, since)
+                             .limit(1)))
 
 
 def scrape_update(reddit, table, update_frequency, update_buffer):
@@ -76,13 +105,14 @@ def scrape_update(reddit, table, update_frequency, update_buffer):
     tuple(list(tuple), list(tuple))
         A tuple with:
         A list of tuples with (id, timestamp, created_utc, score) representing items that were found
-        A list of tuples with (id, timestamp) representing items that could not be found
+        A list of tuples with (id, timestamp, created_utc) representing items that could not be found
     """
+    start = perf_counter()
     session = Session()
     if needs_update(session, table, update_frequency, update_buffer):
         update_cutoff = int(datetime.today().timestamp()) - update_frequency
-        items = session.query(table). \
-            filter(table.created_utc < update_cutoff, table.update_age < update_frequency).limit(MAX_BATCH)
+        items = recent_first(lambda since: update_query(session, table, update_cutoff, update_frequency, since)
+                             .limit(batches[table].size))
 
         if table.__tablename__ == "comments":
             prefix = "t1_"
@@ -90,14 +120,19 @@ def scrape_update(reddit, table, update_frequency, update_buffer):
             prefix = "t3_"
 
         scrape_list = [prefix + item.id for item in items]
-        output = praw_scrape(reddit, scrape_list)
+        output, failed = praw_scrape(reddit, scrape_list)
+        # the stored created_utc locates each item's partition
+        created = {item.id: item.created_utc for item in items}
+        output = [(id, retrieved_on, created[id], score) for id, retrieved_on, _, score in output if id in created]
         deleted = []
 
-        if len(output) != len(scrape_list):
+        # items missing after a failed request were not looked up, so are not known to be deleted
+        if not failed and len(output) != len(scrape_list):
             retrieved_on = int(datetime.today().timestamp())
-            found_ids = set([item[3] for item in output])
-            deleted = [(item.id, retrieved_on) for item in items if item.id not in found_ids]
+            found_ids = set([item[0] for item in output])
+            deleted = [(item.id, retrieved_on, item.created_utc) for item in items if item.id not in found_ids]
 
+        batches[table].record(len(scrape_list), perf_counter() - start)
         log.info("Scraped " + table.__tablename__ + " scores to " + str(update_cutoff))
         return output, deleted
     return [], []
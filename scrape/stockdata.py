@@ -1,10 +1,11 @@
 from os import environ
-from db.models import Ticker, Session
+from db.models import Ticker, Session, notify_update
 import requests
 import logging
 from datetime import datetime
+from scrape.scheduler import scheduler, PRICES
 
-DATA_API_URL = 'https://api.tiingo.com/tiingo/daily/'
+DATA_API_URL = environ.get('TIINGO_URL', 'https://api.tiingo.com') + '/tiingo/daily/'
 API_KEY = environ['TIINGO_API']
 log = logging.getLogger(__name__)
 logging.basicConfig(level=environ['LOG_LEVEL'])
@@ -38,6 +39,7 @@ def update_stock_data(start_date, tickers=None):
             continue
         ticker.price_data = new_data
         ticker.last_update = now
+        notify_update(session)
         session.commit()
     log.info("Skipped " + str(skipped) + " symbols")
     log.info("Updated " + str((len(tickers)) - skipped) + " symbols")
@@ -48,7 +50,14 @@ def data_request(params, ticker):
 
     """
     url = DATA_API_URL + ticker + "/prices"
-    raw_data = requests.get(url, params=params).json()
+    scheduler.acquire('tiingo', PRICES)
+    response = requests.get(url, params=params)
+    scheduler.update_from_headers('tiingo', response.headers)
+    if response.status_code == 429:
+        scheduler.failure('tiingo', response.headers.get('Retry-After'))
+        raise TiingoAPIError("Rate limited on " + ticker + " request")
+    scheduler.success('tiingo')
+    raw_data = response.json()
     log.debug("Stock data for " + ticker)
 
     if isinstance(raw_data, list) and len(raw_data) < 2:
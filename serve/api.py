@@ -0,0 +1,168 @@
+import json
+import logging
+import select
+from bisect import bisect_left, bisect_right
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from os import environ
+from socketserver import ThreadingMixIn
+from threading import Thread
+from urllib.parse import urlparse, parse_qs
+
+import psycopg2
+from sqlalchemy import func
+
+from db.models import Session, Ticker, UPDATE_CHANNEL
+from serve.cache import ResponseCache, make_etag
+
+PORT = int(environ.get('PORT', 8000))
+MAX_TOP = 100
+SERIES_FIELDS = ['date', 'adjOpen', 'adjClose', 'adjVolume',
+                 'positive_count', 'negative_count', 'sentiment_sum', 'scaled_sentiment']
+LISTEN_TIMEOUT = 5
+log = logging.getLogger(__name__)
+logging.basicConfig(level=environ['LOG_LEVEL'])
+
+series_cache = ResponseCache()
+response_cache = ResponseCache()
+
+
+def slice_series(series, start=None, end=None):
+    """Slices a date-sorted series to the inclusive [start, end] date range
+
+    Dates are compared on their 'YYYY-MM-DD' prefix, so both the raw Tiingo
+    timestamps and the dates written by update_symbol_data can be sliced.
+
+    Returns
+    -------
+    list(dict)
+        The items of the series within the date range
+    """
+    dates = [item['date'][:10] for item in series]
+    low = 0 if start is None else bisect_left(dates, start)
+    high = len(series) if end is None else bisect_right(dates, end)
+    return series[low:high]
+
+
+def load_series(symbol):
+    """Loads the price and sentiment series of a symbol, parsing price_data at most once per cache lifetime
+
+    Returns
+    -------
+    list(dict)
+        A date-sorted list of price and sentiment values, or None for unknown symbols
+    """
+    series = series_cache.get(symbol)
+    if series is None:
+        generation = series_cache.generation
+        session = Session()
+        data = session.query(Ticker.price_data).filter(Ticker.symbol == symbol).scalar()
+        session.close()
+        if data is None:
+            return None
+        series = [{field: item[field] for field in SERIES_FIELDS if field in item} for item in data]
+        series.sort(key=lambda item: item['date'])
+        series_cache.put(symbol, series, generation)
+    return series
+
+
+def top_symbols(limit):
+    """Finds the symbols with the most labeled content
+
+    Returns
+    -------
+    list(dict(str: object))
+        A list of dictionaries with symbol and mentions keys, most mentioned first
+    """
+    session = Session()
+    mentions = func.cardinality(Ticker.content_ids)
+    query = session.query(Ticker.symbol, mentions) \
+        .filter(Ticker.content_ids.isnot(None)) \
+        .order_by(mentions.desc()).limit(limit)
+    output = [{'symbol': row[0], 'mentions': row[1]} for row in query.all()]
+    session.close()
+    return output
+
+
+def route(path, params):
+    """Builds the response payload for a request
+
+    Returns
+    -------
+    tuple(int, object)
+        A tuple with the HTTP status and a JSON serializable payload
+    """
+    parts = [part for part in path.split('/') if part]
+    if len(parts) == 2 and parts[0] == 'symbols':
+        series = load_series(parts[1].upper())
+        if series is None:
+            return 404, {'error': 'Unknown symbol ' + parts[1]}
+        return 200, slice_series(series, params.get('start'), params.get('end'))
+    if parts == ['top']:
+        try:
+            limit = min(int(params.get('limit', 20)), MAX_TOP)
+        except ValueError:
+            return 400, {'error': 'limit must be an integer'}
+        return 200, top_symbols(limit)
+    return 404, {'error': 'Unknown path ' + path}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Serves cached JSON responses with ETag revalidation
+
+    """
+
+    def do_GET(self):
+        cached = response_cache.get(self.path)
+        if cached is None:
+            generation = response_cache.generation
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            status, payload = route(url.path, params)
+            body = json.dumps(payload).encode('utf-8')
+            cached = (status, body, make_etag(body))
+            if status == 200:
+                response_cache.put(self.path, cached, generation)
+        status, body, etag = cached
+
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug(format % args)
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def listen_for_updates():
+    """Drops all cached responses whenever the worker reports a new batch written
+
+    """
+    db = psycopg2.connect(environ['DATABASE_STRING'])
+    db.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    db.cursor().execute('LISTEN ' + UPDATE_CHANNEL)
+    while True:
+        if select.select([db], [], [], LISTEN_TIMEOUT) == ([], [], []):
+            continue
+        db.poll()
+        if db.notifies:
+            del db.notifies[:]
+            series_cache.invalidate()
+            response_cache.invalidate()
+            log.debug("Cache invalidated")
+
+
+if __name__ == "__main__":
+    Thread(target=listen_for_updates, daemon=True).start()
+    log.info("Serving on port " + str(PORT))
+    ThreadingServer(('', PORT), RequestHandler).serve_forever()
@@ -0,0 +1,72 @@
+from hashlib import sha1
+from threading import Lock
+from time import time
+
+from lru import LRU
+
+MAX_ENTRIES = 1024
+TTL_SECONDS = 300
+
+
+def make_etag(body):
+    """Makes a strong ETag for a serialized response body
+
+    Returns
+    -------
+    str
+        A quoted hex digest of the body
+    """
+    return '"' + sha1(body).hexdigest() + '"'
+
+
+class ResponseCache:
+    """An in-process LRU cache of serialized responses with a time to live
+
+    Entries expire after ttl seconds, and the whole cache is dropped by invalidate
+    when the worker writes a new batch of labels, prices or sentiment. Callers read
+    generation before loading a value and pass it to put, so a value loaded before
+    an invalidation is not cached after it.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, clock=time):
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries = LRU(max_entries)
+        self._lock = Lock()
+
+    def get(self, key):
+        """Gets a cached value if present and not expired
+
+        Returns
+        -------
+        object
+            The cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, generation=None):
+        """Caches a value unless the cache was invalidated since generation
+
+        """
+        with self._lock:
+            if generation is None or generation == self.generation:
+                self._entries[key] = (self.clock() + self.ttl, value)
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,74 @@
+"""Polls the query service like a set of dashboards and reports throughput and latency
+
+Usage: python -m serve.load_test http://localhost:8000 --clients 16 --seconds 30 AAPL TSLA
+"""
+import argparse
+import random
+from threading import Thread
+from time import perf_counter
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+
+def poll(base_url, paths, deadline, revalidate, results):
+    """Requests random paths until the deadline, optionally revalidating with the last ETag seen
+
+    """
+    etags = {}
+    while perf_counter() < deadline:
+        path = random.choice(paths)
+        request = Request(base_url + path)
+        if revalidate and path in etags:
+            request.add_header('If-None-Match', etags[path])
+        start = perf_counter()
+        try:
+            with urlopen(request) as response:
+                response.read()
+                etags[path] = response.headers.get('ETag')
+                status = response.status
+        except HTTPError as err:
+            status = err.code
+        results.append((status, perf_counter() - start))
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def report(results, seconds):
+    latencies = sorted(item[1] for item in results)
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    print("requests: " + str(len(results)) + " (" + str(round(len(results) / seconds, 1)) + " req/s)")
+    print("statuses: " + str(statuses))
+    if latencies:
+        for label, fraction in [('p50', .5), ('p95', .95), ('p99', .99)]:
+            print(label + ": " + str(round(percentile(latencies, fraction) * 1000, 2)) + " ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('url')
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--start', help='YYYY-MM-DD start of the requested date range')
+    parser.add_argument('--no-etag', action='store_true', help='never send If-None-Match')
+    args = parser.parse_args()
+
+    query = '' if args.start is None else '?start=' + args.start
+    paths = ['/symbols/' + symbol + query for symbol in args.symbols] + ['/top']
+    results = []
+    deadline = perf_counter() + args.seconds
+    threads = [Thread(target=poll, args=(args.url.rstrip('/'), paths, deadline, not args.no_etag, results))
+               for _ in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report(results, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+from collections import namedtuple
+
+import pytest
+
+from analyze import analysis
+from db.models import Comment
+
+Symbol = namedtuple('Symbol', ['symbol'])
+Row = namedtuple('Row', ['id', 'processed', 'subreddit', 'created_utc', 'archive_segment', 'body'])
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self):
+        self.executed = []
+        self.committed = False
+
+    def query(self, *columns):
+        return FakeQuery([Symbol('GME'), Symbol('AMC'), Symbol('I')])
+
+    def execute(self, statement, params=None):
+        self.executed.append((str(statement), params))
+
+    def commit(self):
+        self.committed = True
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(analysis, 'Session', lambda: session)
+    return session
+
+
+@pytest.fixture
+def analyzed(session, monkeypatch):
+    rows = [Row('a1', False, 'wsb', 100, None, 'GME to the moon'),
+            Row('b2', True, 'wsb', 200, None, 'AMC is great'),
+            Row('c3', False, 'wsb', 300, None, 'nothing to see here'),
+            Row('d4', False, 'stocks', 400, None, 'I like GME and AMC'),
+            Row('e5', False, 'wsb', 500, 7, None)]
+    monkeypatch.setattr(analysis, 'recent_first', lambda build: rows)
+    monkeypatch.setattr(analysis.archive, 'segment_texts',
+                        lambda session, segments: {'e5': 'AMC squeeze'} if segments == {7} else {})
+    return analysis.analyze_content(Comment)
+
+
+def test_unprocessed_content_gets_labels_and_sentiment(analyzed):
+    content = {update['id']: update for update in analyzed[0]}
+    assert content['a1']['labels'] == ['GME']
+    assert content['a1']['processed'] is True
+    assert content['a1']['created_utc'] == 100
+    assert content['a1']['sentiment'] == analysis.kernel.compound('GME to the moon')
+
+
+def test_processed_content_only_gets_sentiment(analyzed):
+    content = {update['id']: update for update in analyzed[0]}
+    assert set(content['b2']) == {'id', 'created_utc', 'sentiment'}
+
+
+def test_unknown_is_left_out_of_mentions_and_ticker_labels(analyzed):
+    content, ticker_labels, mentions = analyzed
+    assert [update['labels'] for update in content if update['id'] == 'c3'] == [['UNKNOWN']]
+    assert {item['symbol'] for item in ticker_labels} == {'GME', 'AMC'}
+    assert all('UNKNOWN' not in symbols for symbols, _, _ in mentions)
+    assert len(mentions) == 3
+
+
+def test_ignored_symbols_are_not_labels(analyzed):
+    content = {update['id']: update for update in analyzed[0]}
+    assert sorted(content['d4']['labels']) == ['AMC', 'GME']
+    assert {'symbol': 'GME', 'labels': ['t1_a1', 't1_d4']} in analyzed[1]
+
+
+def test_archived_content_is_read_from_its_segment(analyzed):
+    content = {update['id']: update for update in analyzed[0]}
+    assert content['e5']['labels'] == ['AMC']
+    assert content['e5']['sentiment'] == analysis.kernel.compound('AMC squeeze')
+
+
+def test_write_analysis_splits_labeled_and_scored_content(session, monkeypatch):
+    written = []
+    notified = []
+    monkeypatch.setattr(analysis.comention, 'write_mentions', lambda s, mentions: written.append(mentions))
+    monkeypatch.setattr(analysis, 'notify_update', notified.append)
+    labeled = {'id': 'a1', 'created_utc': 100, 'sentiment': .5, 'labels': ['GME'], 'processed': True}
+    scored = {'id': 'b2', 'created_utc': 200, 'sentiment': -.5}
+    mentions = [(['GME'], 'wsb', 100)]
+    analysis.write_analysis(Comment, [labeled, scored], [{'symbol': 'GME', 'labels': ['t1_a1']}], mentions)
+
+    statements = dict(session.executed)
+    assert statements[analysis.LABELED_UPDATE.format('comments')] == [labeled]
+    assert statements[analysis.SCORED_UPDATE.format('comments')] == [scored]
+    assert statements[str(analysis.TICKER_UPDATE)] == [{'symbol': 'GME', 'labels': ['t1_a1']}]
+    assert written == [mentions]
+    assert notified == [session]
+    assert session.committed
+
+
+def test_write_analysis_without_ticker_labels_does_not_notify(session, monkeypatch):
+    notified = []
+    monkeypatch.setattr(analysis.comention, 'write_mentions', lambda s, mentions: None)
+    monkeypatch.setattr(analysis, 'notify_update', notified.append)
+    analysis.write_analysis(Comment, [{'id': 'b2', 'created_utc': 200, 'sentiment': 0.}], [])
+    assert [statement for statement, _ in session.executed] == [analysis.SCORED_UPDATE.format('comments')]
+    assert notified == []
+    assert session.committed
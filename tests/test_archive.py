@@ -0,0 +1,30 @@
+from sqlalchemy.dialects import postgresql
+
+from db.archive import pack, unpack, eligible_query, text_column
+from db.models import Session, Comment, Post
+
+
+def test_pack_round_trip():
+    items = [['abc', 'AAPL to the moon'], ['abd', ''], ['abe', 'café \U0001F680 "quoted"']]
+    assert unpack(pack(items)) == dict(items)
+
+
+def test_pack_compresses_similar_text():
+    items = [[str(i), 'I think the stock is going up, buy calls on TSLA ' + str(i)] for i in range(1000)]
+    raw = sum(len(body) for _, body in items)
+    assert len(pack(items)) < raw / 10
+
+
+def test_text_column():
+    assert text_column(Post) is Post.selftext
+    assert text_column(Comment) is Comment.body
+
+
+def test_eligible_query_requires_fully_processed_old_content():
+    query = eligible_query(Session(), Comment, 1000, 86400)
+    sql = str(query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+    assert 'comments.archive_segment IS NULL' in sql
+    assert 'comments.created_utc < 1000' in sql
+    assert 'comments.processed IS true' in sql
+    assert 'comments.sentiment IS NOT NULL' in sql
+    assert 'comments.update_age >= 86400 OR comments.deleted IS true' in sql
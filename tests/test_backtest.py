@@ -0,0 +1,38 @@
+import analyze.backtest as bt
+import numpy as np
+import pytest
+
+
+def test_rolling_sum():
+    values = np.arange(1., 6.).reshape(-1, 1)
+    assert bt.rolling_sum(values, 2).ravel().tolist() == [1, 3, 5, 7, 9]
+
+
+@pytest.mark.parametrize("long_short,expected",
+                         [(False, [1, 0, 0, 0]),
+                          (True, [1, 0, -1, 0])])
+def test_positions(long_short, expected):
+    sentiment = np.array([[.5], [0], [-.5], [0]])
+    held = bt.positions(sentiment, lookback=1, threshold=.1, hold=1, long_short=long_short)
+    assert held.ravel().tolist() == expected
+
+
+def test_positions_held():
+    sentiment = np.array([[.5], [0], [0], [0]])
+    held = bt.positions(sentiment, lookback=1, threshold=.1, hold=2, long_short=False)
+    assert held.ravel().tolist() == [1, 1, 0, 0]
+
+
+def test_strategy_returns_equal_weight():
+    opens = np.array([[10., 10.], [11., 9.], [11., np.nan]])
+    sentiment = np.array([[1., 1.], [0., 0.], [0., 0.]])
+    returns = bt.strategy_returns(opens, sentiment, lookback=1, threshold=0, hold=1, long_short=False)
+    assert returns.tolist() == pytest.approx([0, 0, 0])
+    sentiment = np.array([[1., 0.], [0., 0.], [0., 0.]])
+    returns = bt.strategy_returns(opens, sentiment, lookback=1, threshold=0, hold=1, long_short=False)
+    assert returns.tolist() == pytest.approx([.1, 0, 0])
+
+
+def test_parameter_sets():
+    params = bt.parameter_sets({'hold': [1, 2], 'lookback': [3]})
+    assert params == [{'hold': 1, 'lookback': 3}, {'hold': 2, 'lookback': 3}]
@@ -0,0 +1,69 @@
+from db.batch import BatchController, TableBatches
+import pytest
+
+MB = 2 ** 20
+
+
+@pytest.fixture
+def rss():
+    class Rss:
+        value = 100 * MB
+
+        def __call__(self):
+            return self.value
+    return Rss()
+
+
+def controller(rss, size=1000):
+    return BatchController('test', size, minimum=10, maximum=8000, target_seconds=10,
+                           memory_limit=500 * MB, rss=rss)
+
+
+def test_grows_when_fast(rss):
+    batch = controller(rss)
+    assert batch.record(1000, 1) == 1500
+    assert batch.record(1500, 1.5) == 2250
+
+
+def test_shrinks_to_target_latency(rss):
+    batch = controller(rss)
+    assert batch.record(1000, 20) == 500
+
+
+def test_limited_by_memory_headroom(rss):
+    batch = controller(rss)
+    # 400 MB headroom, 100 KB per item held at 4x
+    assert batch.record(1000, 1, 1000 * 100 * 1024) == 1024
+
+
+def test_halves_near_memory_limit(rss):
+    batch = controller(rss)
+    rss.value = 480 * MB
+    assert batch.record(1000, 1) == 500
+
+
+def test_bounds(rss):
+    batch = controller(rss, size=20)
+    assert batch.record(20, 100) == 10
+    batch = controller(rss, size=7000)
+    assert batch.record(7000, .1) == 8000
+
+
+def test_empty_batch_keeps_estimates(rss):
+    batch = controller(rss)
+    batch.record(0, .1)
+    assert batch.seconds_per_item is None
+
+
+def test_table_batches_are_sized_separately():
+    class Posts:
+        __tablename__ = 'posts'
+
+    class Comments:
+        __tablename__ = 'comments'
+
+    batches = TableBatches('analysis', 1000, minimum=10, target_seconds=10, rss=lambda: 0)
+    batches[Posts].record(1000, 20)
+    assert batches[Posts].size == 500
+    assert batches[Comments].size == 1000
+    assert batches[Posts] is batches[Posts]
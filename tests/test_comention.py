@@ -0,0 +1,53 @@
+import analyze.comention as cm
+
+DAY = cm.DAY_SECONDS
+
+
+def sample_graph():
+    graph = cm.CoMentionGraph()
+    graph.add_mentions([(['AAPL', 'MSFT'], 'stocks', 0),
+                        (['AAPL', 'MSFT', 'AMD'], 'stocks', 10),
+                        (['AMD', 'NVDA'], 'investing', DAY),
+                        (['AMD', 'NVDA'], 'investing', DAY + 5),
+                        (['TSLA'], 'investing', DAY)])
+    return graph
+
+
+def test_counts_are_symmetric_with_mentions_on_the_diagonal():
+    counts = sample_graph().window()
+    assert (counts != counts.T).nnz == 0
+    graph = sample_graph()
+    assert graph.window()[graph.index['AMD'], graph.index['AMD']] == 3
+
+
+def test_neighbors_and_top_pairs():
+    graph = sample_graph()
+    assert graph.neighbors('AAPL') == [('MSFT', 2), ('AMD', 1)]
+    assert graph.top_pairs(2) == [('AAPL', 'MSFT', 2), ('AMD', 'NVDA', 2)]
+    assert graph.neighbors('GME') == []
+
+
+def test_window_selects_days():
+    graph = sample_graph()
+    assert graph.neighbors('AMD', start=DAY) == [('NVDA', 2)]
+    assert graph.top_pairs(end=DAY - 1)[0] == ('AAPL', 'MSFT', 2)
+
+
+def test_days_grow_with_new_symbols():
+    graph = sample_graph()
+    graph.window()
+    graph.add(['GME', 'AAPL'], 20)
+    assert graph.neighbors('AAPL', end=DAY - 1) == [('MSFT', 2), ('AMD', 1), ('GME', 1)]
+
+
+def test_bytes_round_trip():
+    counts = sample_graph().window()
+    assert (cm.from_bytes(cm.to_bytes(counts)) != counts).nnz == 0
+    assert cm.resized(counts, 10).shape == (10, 10)
+
+
+def test_to_networkx():
+    graph = sample_graph().to_networkx(min_count=2)
+    assert graph['AAPL']['MSFT']['weight'] == 2
+    assert not graph.has_edge('AAPL', 'AMD')
+    assert dict(graph.nodes(data=True))['TSLA']['mentions'] == 1
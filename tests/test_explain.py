@@ -0,0 +1,20 @@
+from db.explain import sequential_scans
+
+
+def test_sequential_scans_nested():
+    plan = {'Node Type': 'Limit', 'Plans': [
+        {'Node Type': 'Bitmap Heap Scan', 'Relation Name': 'posts', 'Plans': [
+            {'Node Type': 'BitmapOr', 'Plans': [{'Node Type': 'Bitmap Index Scan'}]}]},
+        {'Node Type': 'Seq Scan', 'Relation Name': 'tickers'}]}
+    assert sequential_scans(plan) == {'tickers'}
+
+
+def test_sequential_scans_partitions():
+    plan = {'Node Type': 'Append', 'Plans': [
+        {'Node Type': 'Seq Scan', 'Relation Name': 'comments_y2026m10'},
+        {'Node Type': 'Index Scan', 'Relation Name': 'comments_y2026m09'}]}
+    assert sequential_scans(plan) == {'comments'}
+
+
+def test_sequential_scans_none():
+    assert sequential_scans({'Node Type': 'Index Only Scan', 'Relation Name': 'comments'}) == set()
@@ -0,0 +1,63 @@
+import json
+from time import time
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from bench.fakes import FakePushshift, FakeTiingo, RateLimit
+
+
+def test_rate_limit_headers_and_refusal():
+    limit = RateLimit(2, 60)
+    allowed, headers = limit.take()
+    assert allowed
+    assert headers['X-Ratelimit-Remaining'] == '1.0' and headers['X-Ratelimit-Used'] == '1'
+    assert 0 < int(headers['X-Ratelimit-Reset']) <= 61
+    assert limit.take()[1]['X-Ratelimit-Remaining'] == '0.0'
+    allowed, headers = limit.take()
+    assert not allowed
+    assert headers['Retry-After'] == headers['X-Ratelimit-Reset']
+
+
+def test_unlimited_rate_limit_sends_no_headers():
+    assert RateLimit().take() == (True, {})
+
+
+def test_service_answers_429_past_its_limit():
+    service = FakeTiingo(rate_limit=1).start()
+    url = service.url + '/tiingo/daily/AAPL/prices?startDate=2026-10-01'
+    try:
+        with urlopen(url) as response:
+            assert response.headers['X-Ratelimit-Remaining'] == '0.0'
+            assert json.loads(response.read())
+        try:
+            urlopen(url)
+            assert False, 'expected a 429 response'
+        except HTTPError as error:
+            assert error.code == 429
+            assert int(error.headers['Retry-After']) > 0
+        assert service.requests == 2
+    finally:
+        service.stop()
+        service.server.server_close()
+
+
+def test_pushshift_pages_by_after():
+    start_utc = int(time()) - 1000
+    fake = FakePushshift(start_utc, interval=100, page_size=4)
+    try:
+        pages = []
+        after = start_utc - 1
+        while True:
+            status, payload = fake.respond('GET', '/reddit/comment/search', {'subreddit': 'stocks', 'after': after})
+            assert status == 200
+            if not payload['data']:
+                break
+            pages.append(payload['data'])
+            after = payload['data'][-1]['created_utc']
+    finally:
+        fake.server.server_close()
+    created = [item['created_utc'] for page in pages for item in page]
+    assert [len(page) for page in pages[:-1]] == [4] * (len(pages) - 1)
+    assert created == list(range(start_utc, start_utc + 100 * len(created), 100))
+    assert len(created) in (10, 11)
+    assert len({item['id'] for page in pages for item in page}) == len(created)
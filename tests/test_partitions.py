@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+
+from db.partitions import month_start, next_month, partition_name, month_starts, recent_first
+
+
+def utc(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+def test_month_bounds():
+    assert month_start(utc(2026, 10, 18, 9, 30)) == utc(2026, 10, 1)
+    assert next_month(utc(2026, 12, 1)) == utc(2027, 1, 1)
+    assert partition_name('comments', utc(2026, 2, 1)) == 'comments_y2026m02'
+
+
+def test_month_starts_includes_both_ends():
+    assert month_starts(utc(2026, 11, 20), utc(2027, 2, 1)) == \
+        [utc(2026, 11, 1), utc(2026, 12, 1), utc(2027, 1, 1), utc(2027, 2, 1)]
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+def test_recent_first_falls_back_when_recent_is_empty():
+    bounds = []
+
+    def build(since):
+        bounds.append(since)
+        return FakeQuery([] if since is not None else ['old'])
+
+    assert recent_first(build) == ['old']
+    assert bounds[0] is not None and bounds[1] is None
+
+
+def test_recent_first_stops_at_recent_rows():
+    bounds = []
+
+    def build(since):
+        bounds.append(since)
+        return FakeQuery(['new'])
+
+    assert recent_first(build) == ['new']
+    assert len(bounds) == 1
@@ -0,0 +1,24 @@
+import csv
+from collections import namedtuple
+
+import pytest
+
+from analyze.reprocess import batch_csv, reprocess
+
+Row = namedtuple('Row', ['id', 'created_utc'])
+
+
+def test_batch_csv_writes_array_literals_and_nulls():
+    rows = [Row('a1', 100), Row('b2', 200)]
+    output = list(csv.reader(batch_csv(rows, {'a1': {'MSFT', 'AAPL'}, 'b2': {'UNKNOWN'}}, None)))
+    assert output == [['a1', '100', '{AAPL,MSFT}', ''], ['b2', '200', '{UNKNOWN}', '']]
+
+
+def test_batch_csv_keeps_full_precision_sentiment():
+    output = batch_csv([Row('a1', 100)], None, {'a1': -0.1234567890123}).read()
+    assert output.strip() == 'a1,100,,-0.1234567890123'
+
+
+def test_relabeling_a_subset_of_tables_is_refused():
+    with pytest.raises(ValueError):
+        reprocess(tables=['posts'], steps=['labels'])
@@ -0,0 +1,94 @@
+import scrape.scheduler as sc
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_bucket_refills_at_rate(clock):
+    bucket = sc.TokenBucket(10, 10, clock)
+    for _ in range(10):
+        assert bucket.wait_time() == 0
+        bucket.take()
+    assert bucket.wait_time() == pytest.approx(1)
+    clock.now = 1
+    assert bucket.wait_time() == 0
+
+
+def test_bucket_reserve(clock):
+    bucket = sc.TokenBucket(10, 10, clock)
+    for _ in range(8):
+        bucket.take()
+    assert bucket.wait_time() == 0
+    assert bucket.wait_time(reserve=2) == pytest.approx(1)
+
+
+def test_bucket_update_from_server(clock):
+    bucket = sc.TokenBucket(600, 600, clock)
+    bucket.update(0, 30)
+    assert bucket.wait_time() == pytest.approx(30)
+    bucket.update(100, 50)
+    assert bucket.tokens == 100
+    assert bucket.rate == 2
+
+
+def test_acquire_waits_for_tokens(clock):
+    scheduler = sc.Scheduler({'api': (2, 2)}, clock, clock.sleep)
+    for _ in range(4):
+        scheduler.acquire('api', sc.SCRAPE)
+    assert clock.now == pytest.approx(2)
+
+
+def test_lower_priority_leaves_reserve(clock):
+    scheduler = sc.Scheduler({'api': (10, 10)}, clock, clock.sleep)
+    scheduler.acquire('api', sc.SCRAPE)
+    for _ in range(7):
+        scheduler.acquire('api', sc.PRICES)
+    assert clock.now == 0
+    scheduler.acquire('api', sc.PRICES)
+    assert clock.now > 0
+
+
+def test_sole_priority_drains_bucket(clock):
+    scheduler = sc.Scheduler({'api': (10, 10)}, clock, clock.sleep)
+    for _ in range(10):
+        scheduler.acquire('api', sc.PRICES)
+    assert clock.now == 0
+
+
+def test_reserve_lapses_after_period(clock):
+    scheduler = sc.Scheduler({'api': (10, 10)}, clock, clock.sleep)
+    scheduler.acquire('api', sc.SCRAPE)
+    assert scheduler.reserve('api', sc.PRICES) == 2
+    clock.now = 10
+    assert scheduler.reserve('api', sc.PRICES) == 0
+
+
+def test_headers_update_bucket(clock):
+    scheduler = sc.Scheduler({'api': (10, 10)}, clock, clock.sleep)
+    scheduler.update_from_headers('api', {'X-Ratelimit-Remaining': '0.0', 'X-Ratelimit-Reset': '20'})
+    scheduler.acquire('api', sc.SCRAPE)
+    assert clock.now >= 20
+
+
+def test_failure_backoff_grows_with_jitter(clock):
+    scheduler = sc.Scheduler({'api': (10, 10)}, clock, clock.sleep)
+    delays = [scheduler.failure('api') for _ in range(4)]
+    for attempt, delay in enumerate(delays, 1):
+        assert sc.BACKOFF_BASE ** attempt / 2 <= delay <= sc.BACKOFF_BASE ** attempt
+    scheduler.success('api')
+    assert scheduler.failure('api') <= sc.BACKOFF_BASE
+    assert scheduler.failure('api', retry_after=100) == 100
@@ -0,0 +1,70 @@
+from serve.api import slice_series
+from serve.cache import ResponseCache, make_etag
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def series():
+    return [{'date': '2019-10-0' + str(day) + 'T00:00:00.000Z', 'adjOpen': day} for day in range(1, 6)]
+
+
+@pytest.mark.parametrize("start,end,expected",
+                         [(None, None, [1, 2, 3, 4, 5]),
+                          ('2019-10-02', None, [2, 3, 4, 5]),
+                          (None, '2019-10-03', [1, 2, 3]),
+                          ('2019-10-02', '2019-10-04', [2, 3, 4]),
+                          ('2019-10-06', None, []),
+                          ('2019-09-01', '2019-09-30', [])])
+def test_slice_series(series, start, end, expected):
+    assert [item['adjOpen'] for item in slice_series(series, start, end)] == expected
+
+
+def test_cache_expires_after_ttl():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=10, clock=clock)
+    cache.put('/top', 'body')
+    clock.now = 10
+    assert cache.get('/top') == 'body'
+    clock.now = 11
+    assert cache.get('/top') is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+
+
+def test_cache_invalidate():
+    cache = ResponseCache()
+    cache.put('a', 1)
+    cache.invalidate()
+    assert cache.get('a') is None
+
+
+def test_cache_skips_values_loaded_before_invalidate():
+    cache = ResponseCache()
+    generation = cache.generation
+    cache.invalidate()
+    cache.put('a', 'stale', generation)
+    assert cache.get('a') is None
+    cache.put('a', 'fresh', cache.generation)
+    assert cache.get('a') == 'fresh'
+
+
+def test_etag_depends_on_body():
+    assert make_etag(b'[1]') == make_etag(b'[1]')
+    assert make_etag(b'[1]') != make_etag(b'[2]')
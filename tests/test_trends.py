@@ -0,0 +1,83 @@
+import analyze.trends as tr
+
+HOUR = tr.BUCKET_SECONDS
+
+
+def test_count_min_never_underestimates():
+    sketch = tr.CountMinSketch(width=16, depth=3)
+    counts = {'SYM' + str(i): i for i in range(50)}
+    for key, count in counts.items():
+        sketch.add(key, count)
+    for key, count in counts.items():
+        assert sketch.estimate(key) >= count
+
+
+def test_count_min_rows_hash_independently():
+    sketch = tr.CountMinSketch(width=64, depth=4)
+    keys = [a + b + c for a in 'ABCDEFGH' for b in 'ABCDEFGH' for c in 'ABCDEFGH']
+    by_first_row = {}
+    for key in keys:
+        by_first_row.setdefault(int(sketch.cells(key)[1][0]), []).append(key)
+    colliding = [(group[0], other) for group in by_first_row.values() for other in group[1:]]
+    assert colliding
+    same_everywhere = [pair for pair in colliding
+                       if (sketch.cells(pair[0])[1] == sketch.cells(pair[1])[1]).all()]
+    assert len(same_everywhere) < len(colliding) / 100
+
+
+def test_space_saving_keeps_heavy_hitters():
+    summary = tr.SpaceSaving(k=3)
+    for key in ['A'] * 10 + ['B'] * 8 + list('CDEFG'):
+        summary.add(key)
+    assert len(summary.counts) == 3
+    assert [key for key, _ in summary.top(2)] == ['A', 'B']
+
+
+def test_window_drops_expired_buckets():
+    detector = tr.TrendDetector(window_buckets=2)
+    detector.add('F', 'stocks', 0)
+    detector.add('F', 'stocks', HOUR)
+    assert detector.window_count('F') == 2
+    detector.add('GM', 'stocks', 2 * HOUR)
+    assert detector.window_count('F') == 1
+    detector.add('F', 'stocks', 0)  # older than the window
+    assert detector.window_count('F') == 1
+
+
+def test_top_by_subreddit():
+    detector = tr.TrendDetector()
+    detector.add_mentions([(['F', 'GM'], 'stocks', 0), (['F'], 'investing', 0), (['F'], 'stocks', 0)])
+    assert detector.top(1) == [('F', 3)]
+    assert detector.top(subreddit='stocks') == [('stocks/F', 2), ('stocks/GM', 1)]
+
+
+def test_trending_against_baseline():
+    detector = tr.TrendDetector(window_buckets=2)
+    for hour in range(10):
+        detector.add_mentions([(['F'], 'stocks', hour * HOUR)] * 5 + [(['GM'], 'stocks', hour * HOUR)])
+    assert detector.trending() == []
+    for hour in range(10, 12):
+        detector.add_mentions([(['F'], 'stocks', hour * HOUR)] * 5 + [(['GM'], 'stocks', hour * HOUR)] * 50)
+    assert [item['key'] for item in detector.trending()] == ['GM']
+    assert [item['key'] for item in detector.trending(subreddit='stocks')] == ['stocks/GM']
+
+
+def test_detector_state_round_trip():
+    detector = tr.TrendDetector(window_buckets=2)
+    for hour in range(10):
+        detector.add_mentions([(['F'], 'stocks', hour * HOUR)] * 5 + [(['GM'], 'stocks', hour * HOUR)])
+    for hour in range(10, 12):
+        detector.add_mentions([(['GM'], 'stocks', hour * HOUR)] * 50)
+    restored = tr.TrendDetector.from_bytes(detector.to_bytes())
+    assert restored.trending() == detector.trending() != []
+    assert restored.top(subreddit='stocks') == detector.top(subreddit='stocks')
+    restored.add('GM', 'stocks', 12 * HOUR)
+    detector.add('GM', 'stocks', 12 * HOUR)
+    assert restored.window_count('GM') == detector.window_count('GM')
+    assert restored.baseline_count('GM') == detector.baseline_count('GM')
+
+
+def test_empty_detector_state_round_trip():
+    restored = tr.TrendDetector.from_bytes(tr.TrendDetector().to_bytes())
+    assert restored.current is None
+    assert restored.top() == []
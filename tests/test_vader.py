@@ -0,0 +1,68 @@
+import random
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer, BOOSTER_DICT, NEGATE
+from analyze.vader import VaderKernel, strip_token, MAX_TOKEN_CACHE
+import pytest
+
+REFERENCE = ["VADER is smart, handsome, and funny.",
+             "VADER is VERY SMART, uber handsome, and FRIGGIN FUNNY!!!",
+             "VADER is not smart, handsome, nor funny.",
+             "At least it isn't a horrible book.",
+             "The book was only kind of good.",
+             "The plot was good, but the characters are uncompelling and the dialog is not great.",
+             "Today only kinda sux! But I'll get by, lol",
+             "Make sure you :) or :D today!",
+             "Catch utf-8 emoji such as 💘 and 💋 and 😁",
+             "Sentiment analysis has never been this good!",
+             "With VADER, sentiment analysis is the shit!",
+             "On the other hand, VADER is quite bad ass",
+             "Without a doubt, excellent idea.",
+             "Roger Dodger is one of the least compelling variations on this theme.",
+             "$TSLA to the moon!!! 🚀🚀 but puts are printing, good good good",
+             "AAPL is NOT a great buy... but it's not terrible either??",
+             "kind of kind of good, sort of bad",
+             "",
+             "   \n ",
+             "!!!",
+             "a"]
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    return SentimentIntensityAnalyzer()
+
+
+@pytest.fixture(scope='module')
+def kernel(analyzer):
+    return VaderKernel(analyzer)
+
+
+@pytest.mark.parametrize("text", REFERENCE)
+def test_reference_corpus(analyzer, kernel, text):
+    assert repr(kernel.compound(text)) == repr(analyzer.polarity_scores(text)['compound'])
+
+
+def test_random_corpus(analyzer, kernel):
+    rng = random.Random(0)
+    vocab = list(analyzer.lexicon)[::25] + list(BOOSTER_DICT) + NEGATE + \
+        ['but', 'least', 'at', 'very', 'kind', 'of', 'never', 'so', 'this', 'without', 'doubt', 'the', 'AAPL']
+    emojis = list(analyzer.emojis)[:50]
+    punctuation = ['', '', ',', '.', '!', '?', '!!', '?!?', "'", '$', '...']
+
+    def word():
+        item = rng.choice(vocab)
+        if rng.random() < .2:
+            item = item.upper()
+        if rng.random() < .1:
+            item = rng.choice(emojis)
+        return rng.choice(punctuation[:5]) + item + rng.choice(punctuation)
+
+    texts = [" ".join(word() for _ in range(rng.randint(0, 30))) for _ in range(2000)]
+    expected = [analyzer.polarity_scores(text)['compound'] for text in texts]
+    assert kernel.scores(texts) == expected
+
+
+def test_token_cache_is_bounded(kernel):
+    kernel.scores(["tok" + str(i) + "!" for i in range(MAX_TOKEN_CACHE + 10)])
+    assert strip_token.cache_info().currsize == MAX_TOKEN_CACHE
+    assert strip_token("tok0!") == ("tok0", "tok0")
@@ -1,11 +1,12 @@
 import os
 from datetime import datetime
-from time import sleep, gmtime, strftime
+from time import sleep, gmtime, strftime, perf_counter
 import praw
 import logging
 
-from analyze import sentiment, tickers, plot
-from db.models import add_posts, add_comments, Post, Comment
+from analyze import analysis, tickers, trends, plot
+from db import archive, partitions
+from db.models import add_posts, add_comments, Post, Comment, engine
 from scrape import reddit
 from scrape import scores, stockdata
 
@@ -23,7 +24,9 @@ config = {'subreddits': ["investing", "RobinHood", "wallstreetbets",
           'client_secret': os.environ['SECRET'],
           'user_agent': os.environ['APPNAME'],
           'username': os.environ['USERNAME'],
-          'password': os.environ['PASSWORD']}
+          'password': os.environ['PASSWORD'],
+          'oauth_url': os.environ.get('REDDIT_OAUTH_URL', 'https://oauth.reddit.com'),
+          'reddit_url': os.environ.get('REDDIT_URL', 'https://www.reddit.com')}
 log = logging.getLogger(__name__)
 logging.basicConfig(level=os.environ['LOG_LEVEL'])
 
@@ -41,7 +44,9 @@ def start_reddit(configuration):
                        client_secret=configuration['client_secret'],
                        user_agent=configuration['user_agent'],
                        username=configuration['username'],
-                       password=configuration['password'])
+                       password=configuration['password'],
+                       oauth_url=configuration['oauth_url'],
+                       reddit_url=configuration['reddit_url'])
 
 
 class Worker:
@@ -61,18 +66,15 @@ class Worker:
         self.start_day = datetime.today().date()
         self.loop_start = int(datetime.today().timestamp())
         self.reddit = start_reddit(configuration)
+        self.trends = trends.load_detector()
         # data
         self.subreddit_stack = list(self.subreddits)
         self.comments = None
         self.posts = None
         self.comment_scores = None
         self.post_scores = None
-        self.post_labels = None
-        self.comment_labels = None
-        self.ticker_posts = None
-        self.ticker_comments = None
-        self.post_sentiment = None
-        self.comment_sentiment = None
+        self.post_analysis = None
+        self.comment_analysis = None
 
     def scrape_comments(self):
         while not self.comments:
@@ -113,47 +115,30 @@ class Worker:
         scores.update_content(Post, self.post_scores[0], self.post_scores[1])
         self.post_scores = None
 
-    def label_content(self):
-        self.post_labels = tickers.label_content(Post)
-        self.comment_labels = tickers.label_content(Comment)
-        count = 0 if self.post_labels is None else len(self.post_labels)
-        count += 0 if self.comment_labels is None else len(self.comment_labels)
-        log.info("Labeled " + str(count) + " content items")
-        return self.comment_labels or self.post_labels
-
-    def labels_to_db(self):
-        tickers.write_content_labels(Post, self.post_labels)
-        self.post_labels = None
-        tickers.write_content_labels(Comment, self.comment_labels)
-        self.comment_labels = None
-
-    def label_tickers(self):
-        self.ticker_comments = tickers.label_tickers(Comment)
-        self.ticker_posts = tickers.label_tickers(Post)
-        count = 0 if self.ticker_comments is None else len(self.ticker_comments[1])
-        count += 0 if self.ticker_posts is None else len(self.ticker_posts[1])
-        log.info("Labeled " + str(count) + " ticker items")
-        return any(self.ticker_comments) or any(self.ticker_comments)
-
-    def tickers_to_db(self):
-        tickers.write_ticker_labels(Comment, self.ticker_comments[0], self.ticker_comments[1])
-        self.ticker_comments = None
-        tickers.write_ticker_labels(Post, self.ticker_posts[0], self.ticker_posts[1])
-        self.ticker_posts = None
-
-    def sentiment_analysis(self):
-        self.post_sentiment = sentiment.sentiment(Post)
-        self.comment_sentiment = sentiment.sentiment(Comment)
-        count = 0 if self.post_sentiment is None else len(self.post_sentiment)
-        count += 0 if self.comment_sentiment is None else len(self.comment_sentiment)
+    def analyze_content(self):
+        self.post_analysis = analysis.analyze_content(Post)
+        self.comment_analysis = analysis.analyze_content(Comment)
+        count = len(self.post_analysis[0]) + len(self.comment_analysis[0])
         log.info("Analyzed " + str(count) + " content items")
-        return self.post_sentiment or self.comment_sentiment
-
-    def sentiment_to_db(self):
-        sentiment.write_sentiment(Post, self.post_sentiment)
-        self.post_sentiment = None
-        sentiment.write_sentiment(Comment, self.comment_sentiment)
-        self.comment_sentiment = None
+        return count > 0
+
+    def analysis_to_db(self):
+        for table, (content, ticker_labels, mentions) in [(Post, self.post_analysis),
+                                                          (Comment, self.comment_analysis)]:
+            analysis.write_analysis(table, content, ticker_labels, mentions)
+            self.trends.add_mentions(mentions)
+        self.post_analysis = None
+        self.comment_analysis = None
+
+    def archive_content(self):
+        count = archive.archive_content(Comment, self.update_frequency) \
+            + archive.archive_content(Post, self.update_frequency)
+        if count:
+            log.info("Archived " + str(count) + " content items")
+        return count
+
+    def trends_to_db(self):
+        trends.write_snapshot(self.trends)
 
     def delay(self):
         now = int(datetime.today().timestamp())
@@ -168,31 +153,56 @@ class Worker:
         if self.start_day != datetime.today().date():
             log.info("Daily ticker update ")
             tickers.update_tickers()
+            self.ensure_partitions()
             self.start_day = datetime.today().date()
 
+    def ensure_partitions(self):
+        partitions.ensure_partitions(engine, since=self.earliest_content)
+
+    def stages(self):
+        """Lists the stages of one worker loop in order
+
+        A stage with a write repeats its step, writing after each, until the step finds nothing;
+        count gives the items in each step's result. A stage without a write runs its step once.
+
+        Returns
+        -------
+        list(tuple(str, function, function, function))
+            A list of (name, step, write, count) tuples
+        """
+        return [('posts', self.scrape_posts, self.posts_to_db, lambda: len(self.posts)),
+                ('comments', self.scrape_comments, self.comments_to_db, lambda: len(self.comments)),
+                ('scores', self.scrape_scores, self.scores_to_db,
+                 lambda: sum(len(found) + len(deleted) for found, deleted in (self.comment_scores, self.post_scores))),
+                ('analysis', self.analyze_content, self.analysis_to_db,
+                 lambda: len(self.post_analysis[0]) + len(self.comment_analysis[0])),
+                ('trends', self.trends_to_db, None, None),
+                ('archive', self.archive_content, None, None),
+                ('tickers', self.tickers, None, None)]
+
+    def run_cycle(self, timer=None):
+        """Runs every stage of one worker loop once
+
+        timer, if given, is called with each stage's name, item count and seconds taken
+        """
+        for name, step, write, count in self.stages():
+            start = perf_counter()
+            items = 0
+            if write is None:
+                items = step() or 0
+            else:
+                while step():
+                    items += count()
+                    write()
+            if timer is not None:
+                timer(name, items, perf_counter() - start)
+
 
 if __name__ == "__main__":
     worker = Worker(config)
     log.info("Startup ticker update ")
     tickers.update_tickers()
+    worker.ensure_partitions()
     while True:
-        while worker.scrape_posts():
-            worker.posts_to_db()
-
-        while worker.scrape_comments():
-            worker.comments_to_db()
-
-        while worker.scrape_scores():
-            worker.scores_to_db()
-
-        while worker.label_content():
-            worker.labels_to_db()
-
-        while worker.label_tickers():
-            worker.tickers_to_db()
-
-        while worker.sentiment_analysis():
-            worker.sentiment_to_db()
-
-        worker.tickers()
+        worker.run_cycle()
         worker.delay()  # enforces minimum loop time